@@ -1,22 +1,25 @@
 #!/usr/bin/env python3
-import pandas as pd
-import numpy as np
-from collections import defaultdict
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "src" / "automation"))
+
+from columnar_mirror import read_csv_columns
+from crowd_analytics import dataset_grid, dataset_hourly_profile
+from crowd_dataset import CrowdDataset, WEEKDAY_NAMES
+from crowd_resample import dataset_resample
 
 
 def analyze_hourly_patterns():
-    # CSVファイルを読み込み
-    df = pd.read_csv(
-        "/Users/i_kawano/Documents/training_waitnum_analysis/crowd-dashboard-modern/public/fit_place24_data.csv"
+    # CSVファイルを型付き列として読み込み
+    columns = read_csv_columns(
+        "/Users/i_kawano/Documents/training_waitnum_analysis/crowd-dashboard-modern/public/fit_place24_data.csv",
+        CrowdDataset.COLUMNS,
     )
+    dataset = CrowdDataset.from_columns(columns)
 
-    # 時間別データを集計
-    hourly_stats = defaultdict(list)
-
-    for _, row in df.iterrows():
-        hour = row["hour"]
-        count = row["count"]
-        hourly_stats[hour].append(count)
+    # 時間別データを一括集計
+    profile = dataset_hourly_profile(dataset)
 
     # 24時間の平均を計算
     hourly_averages = []
@@ -26,12 +29,11 @@ def analyze_hourly_patterns():
     print("-" * 45)
 
     for hour in range(24):
-        if hour in hourly_stats:
-            counts = hourly_stats[hour]
-            avg = np.mean(counts)
-            min_count = min(counts)
-            max_count = max(counts)
-            record_count = len(counts)
+        record_count = int(profile["count"][hour])
+        if record_count:
+            avg = profile["mean"][hour]
+            min_count = int(profile["min"][hour])
+            max_count = int(profile["max"][hour])
             hourly_averages.append(round(avg))
             print(
                 f"{hour:2d}時 | {record_count:4d}回 | {avg:6.1f}人 | {min_count:2d}-{max_count:2d}人"
@@ -90,8 +92,37 @@ def analyze_hourly_patterns():
 
     print("];")
 
+    # 曜日×時間帯の平均
+    grid = dataset_grid(dataset)
+    print("\n=== 曜日×時間帯の平均人数 ===")
+    print("曜日      | " + " ".join(f"{hour:>3d}" for hour in range(24)))
+    for weekday, name in enumerate(WEEKDAY_NAMES):
+        cells = [
+            f"{grid['mean'][weekday, hour]:3.0f}" if grid["count"][weekday, hour] else "  -"
+            for hour in range(24)
+        ]
+        print(f"{name:9s} | " + " ".join(cells))
+
+    # 15分グリッドにリサンプリングした曜日別の空き・ピーク時間帯
+    resampled = dataset_resample(dataset, step=15, method="linear", max_gap=60)
+    means, days = resampled.weekday_profile()
+    slot_times = resampled.slot_times()
+    print("\n=== 15分グリッド（線形補間・記録間隔60分まで）の曜日別平均 ===")
+    print(f"対象: {len(resampled.days)}日 × {resampled.slots_per_day}枠, 値のある枠: {resampled.coverage():.1%}")
+    for weekday, name in enumerate(WEEKDAY_NAMES):
+        observed = [slot for slot in range(resampled.slots_per_day) if days[weekday, slot]]
+        if not observed:
+            print(f"{name:9s} | データなし")
+            continue
+        quiet = min(observed, key=lambda slot: means[weekday, slot])
+        peak = max(observed, key=lambda slot: means[weekday, slot])
+        print(
+            f"{name:9s} | 空き {slot_times[quiet]} {means[weekday, quiet]:4.1f}人"
+            f" | ピーク {slot_times[peak]} {means[weekday, peak]:4.1f}人 | {len(observed)}枠"
+        )
+
     # 統計情報
-    total_records = sum(len(counts) for counts in hourly_stats.values())
+    total_records = len(dataset)
     hours_with_data = len([h for h in range(24) if hourly_averages[h] > 0])
 
     print(f"\n=== 統計情報 ===")
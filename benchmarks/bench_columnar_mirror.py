@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+列指向ミラー ベンチマーク
+- CSVを行ごとに読み込んで CrowdDataset を構築する経路と、Parquetミラーから NumPy 配列で構築する経路を比較
+- コミット時の追記（セグメント書き足し）と、その直後の読み込みも計測（読み込み時にCSVを再変換しないこと）
+- 合成データ（既定20万行）で計測し、両経路のデータセットが一致することも確認
+- 使い方: python benchmarks/bench_columnar_mirror.py [--rows N] [--seed N]
+"""
+
+import argparse
+import csv
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_DIR / "src" / "automation"))
+
+from columnar_mirror import COLUMN_KINDS, PYARROW_AVAILABLE, ColumnarMirror, source_stamp
+from crowd_dataset import WEEKDAY_NAMES, CrowdDataset, MINUTES_PER_DAY, from_epoch_minute
+
+STATUSES = [(1, "空いています", 0, 10), (3, "普通", 21, 30), (5, "混雑", 41, 50)]
+
+
+def synthetic_rows(rows, seed, start_minute=19358 * MINUTES_PER_DAY):
+    """2023年以降の5分刻みの記録を模したCSV形式の行"""
+    rng = np.random.default_rng(seed)
+    minutes = np.sort(start_minute + rng.integers(0, 3 * 365 * MINUTES_PER_DAY // 5, rows) * 5)
+    counts = rng.integers(0, 60, rows)
+    statuses = rng.integers(0, len(STATUSES), rows)
+    for minute, count, status in zip(minutes.tolist(), counts.tolist(), statuses.tolist()):
+        timestamp = from_epoch_minute(minute)
+        code, label, low, high = STATUSES[status]
+        yield {
+            "datetime": timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+            "date": timestamp.strftime("%Y-%m-%d"),
+            "time": timestamp.strftime("%H:%M"),
+            "hour": timestamp.hour,
+            "weekday": WEEKDAY_NAMES[timestamp.weekday()],
+            "count": count,
+            "status_label": label,
+            "status_code": code,
+            "status_min": low,
+            "status_max": high,
+            "raw_text": f"{count}人 {label}",
+        }
+
+
+def load_csv(csv_path):
+    """CSV経路（pyarrow未導入時の読み込みと同じ）"""
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        return CrowdDataset.from_rows(csv.DictReader(f))
+
+
+def assert_same(expected, actual):
+    for name in ("minute", "hour", "weekday", "count", "status_code", "status_min", "status_max"):
+        assert getattr(expected, name) == getattr(actual, name), name
+    assert [expected.label_at(i) for i in range(len(expected))] == [actual.label_at(i) for i in range(len(actual))]
+
+
+def timed(func, repeat=3):
+    """最速の実行時間と結果"""
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="columnar mirror benchmark")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if not PYARROW_AVAILABLE:
+        print("pyarrow が未インストールのため計測できません")
+        return 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / "crowd.csv"
+        print(f"合成データ生成中: {args.rows:,}行")
+        with csv_path.open("w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(COLUMN_KINDS))
+            writer.writeheader()
+            writer.writerows(synthetic_rows(args.rows, args.seed))
+        mirror = ColumnarMirror(csv_path.with_suffix(".parquet"))
+
+        csv_sec, expected = timed(lambda: load_csv(csv_path))
+        rebuild_sec, _ = timed(lambda: mirror.rebuild(csv_path), repeat=1)
+        read_sec, dataset = timed(lambda: CrowdDataset.from_arrays(**mirror.read_arrays()))
+        assert_same(expected, dataset)
+
+        # コミット相当: CSVへ追記し、追記分だけをミラーに書き足してから読み込む
+        new_rows = list(synthetic_rows(10, args.seed + 1, start_minute=20500 * MINUTES_PER_DAY))
+        previous = source_stamp(csv_path)
+        with csv_path.open("a", encoding="utf-8", newline="") as f:
+            csv.DictWriter(f, fieldnames=list(COLUMN_KINDS)).writerows(new_rows)
+        append_sec, _ = timed(lambda: mirror.append(new_rows, previous, csv_path), repeat=1)
+        assert mirror.is_fresh(csv_path)
+        read_after_sec, dataset = timed(lambda: CrowdDataset.from_arrays(**mirror.read_arrays()))
+        assert_same(load_csv(csv_path), dataset)
+
+    print(f"CSV読み込み:           {csv_sec:7.3f}s  {args.rows / csv_sec / 1e6:6.2f}M行/s")
+    print(f"ミラー再生成（圧縮時）: {rebuild_sec:7.3f}s")
+    print(f"ミラー読み込み:         {read_sec:7.3f}s  {args.rows / read_sec / 1e6:6.2f}M行/s"
+          f"  (x{csv_sec / read_sec:.1f})")
+    print(f"追記{len(new_rows)}行（コミット時）: {append_sec * 1000:7.1f}ms")
+    print(f"追記後のミラー読み込み: {read_after_sec:7.3f}s  (x{csv_sec / read_after_sec:.1f})")
+    assert read_sec < csv_sec and read_after_sec < csv_sec, "ミラーがCSVより遅い"
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
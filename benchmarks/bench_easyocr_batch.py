@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+EasyOCR 逐次推論 vs バッチ推論 ベンチマーク
+- 同一サイズの画像をまとめて readtext_batched に渡した場合のスループットを計測
+- 使い方: python benchmarks/bench_easyocr_batch.py [--images DIR] [--limit N] [--batch-size N]
+"""
+
+import argparse
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_DIR / "src" / "automation"))
+
+from ocr_engines import EasyOCREngine
+from layout_templates import image_size, load_region
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EasyOCR batched inference benchmark")
+    parser.add_argument("--images", default=str(PROJECT_DIR / "archive" / "screens" / "processed"))
+    parser.add_argument("--limit", type=int, default=16)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--region", default=None,
+                        help="切り出し領域 x0,y0,x1,y1（省略時は画像全体）")
+    args = parser.parse_args()
+
+    engine = EasyOCREngine(["ja", "en"], gpu=False)
+    if not engine.available:
+        print("❌ EasyOCRがインストールされていません")
+        return 1
+
+    region = tuple(int(v) for v in args.region.split(",")) if args.region else None
+    paths = sorted(p for p in Path(args.images).iterdir() if p.suffix.lower() in (".png", ".jpg", ".jpeg"))
+    paths = paths[:args.limit]
+    if not paths:
+        print(f"❌ 画像が見つかりません: {args.images}")
+        return 1
+
+    # 同一サイズごとにグループ化（バッチ推論は同一サイズが前提）
+    groups = defaultdict(list)
+    for path in paths:
+        groups[image_size(path)].append(load_region(path, region))
+    images = [image for group in groups.values() for image in group]
+
+    # モデルロードを計測から除外
+    engine.readtext(images[0])
+
+    started = time.perf_counter()
+    for image in images:
+        engine.readtext(image)
+    sequential = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for group in groups.values():
+        engine.readtext_batched(group, batch_size=args.batch_size)
+    batched = time.perf_counter() - started
+
+    print(f"画像数: {len(images)} (サイズ {len(groups)}種類), batch_size={args.batch_size}")
+    print(f"逐次推論:   {sequential:7.2f}s  {len(images) / sequential:6.2f}枚/s")
+    print(f"バッチ推論: {batched:7.2f}s  {len(images) / batched:6.2f}枚/s  (x{sequential / batched:.2f})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+起動時間ベンチマーク
+- 新しいプロセスで weekly_ocr_pipeline を import するまでの実時間を計測（インタプリタ起動を含む）
+- 比較用に python 自体の起動時間も計測し、import 分の差と起動時間予算を表示
+- 使い方: python benchmarks/bench_startup.py [--runs N]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+AUTOMATION_DIR = PROJECT_DIR / "src" / "automation"
+sys.path.insert(0, str(AUTOMATION_DIR))
+
+
+def measure(code, runs):
+    """code を実行する新しいプロセスの実時間（秒）の中央値"""
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=AUTOMATION_DIR, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="pipeline startup benchmark")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    from weekly_ocr_pipeline import STARTUP_BUDGET_SEC
+
+    baseline = measure("pass", args.runs)
+    startup = measure("import weekly_ocr_pipeline", args.runs)
+    status = "OK" if startup <= STARTUP_BUDGET_SEC else "予算超過"
+    print(f"python起動:          {baseline * 1000:7.1f}ms")
+    print(f"パイプラインimport: {startup * 1000:7.1f}ms  (import分 {(startup - baseline) * 1000:.1f}ms)")
+    print(f"起動時間予算:        {STARTUP_BUDGET_SEC * 1000:7.1f}ms  {status}")
+    return 0 if startup <= STARTUP_BUDGET_SEC else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+曜日×時間帯 統計グリッド ベンチマーク
+- 旧実装相当（行ごとに int() して defaultdict(list) に集計）と NumPy ベクトル化集計を比較
+- 合成データ（既定100万行）で計測し、両者の平均・最小・最大が一致することも確認
+- 使い方: python benchmarks/bench_weekday_hour_grid.py [--rows N] [--seed N]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_DIR / "src" / "automation"))
+
+from crowd_analytics import HOURS, WEEKDAYS, dataset_grid
+from crowd_dataset import CrowdDataset, MINUTES_PER_DAY, from_epoch_minute
+
+
+def synthetic_dataset(rows, seed):
+    """2023年以降の5分刻みの記録を模した合成データ"""
+    rng = np.random.default_rng(seed)
+    start = 19358 * MINUTES_PER_DAY  # 2023-01-01
+    minutes = np.sort(start + rng.integers(0, 3 * 365 * MINUTES_PER_DAY // 5, rows) * 5)
+    counts = rng.integers(0, 60, rows)
+
+    dataset = CrowdDataset()
+    for minute, count in zip(minutes.tolist(), counts.tolist()):
+        dataset.append(from_epoch_minute(minute), count, 3, "普通", 21, 30)
+    return dataset
+
+
+def legacy_grid(rows):
+    """旧実装相当: 文字列の行を int() で変換しながらリストに集計"""
+    cells = defaultdict(list)
+    for row in rows:
+        cells[(int(row["weekday"]), int(row["hour"]))].append(int(row["count"]))
+    return {
+        key: (len(values), sum(values) / len(values), statistics.median(values), min(values), max(values))
+        for key, values in cells.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="weekday x hour grid benchmark")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"合成データ生成中: {args.rows:,}行")
+    dataset = synthetic_dataset(args.rows, args.seed)
+    # 旧実装はCSV由来の文字列dictを入力とする
+    rows = [
+        {"weekday": str(weekday), "hour": str(hour), "count": str(count)}
+        for weekday, hour, count in zip(dataset.weekday, dataset.hour, dataset.count)
+    ]
+
+    started = time.perf_counter()
+    legacy = legacy_grid(rows)
+    legacy_sec = time.perf_counter() - started
+
+    started = time.perf_counter()
+    grid = dataset_grid(dataset)
+    vectorized_sec = time.perf_counter() - started
+
+    for (weekday, hour), (count, mean, median, minimum, maximum) in legacy.items():
+        assert grid["count"][weekday, hour] == count
+        assert abs(grid["mean"][weekday, hour] - mean) < 1e-9
+        assert grid["median"][weekday, hour] == median
+        assert grid["min"][weekday, hour] == minimum and grid["max"][weekday, hour] == maximum
+    assert int(grid["count"].sum()) == args.rows
+
+    print(f"バケット数: {WEEKDAYS}×{HOURS}, 列メモリ: {dataset.nbytes() / 1e6:.1f}MB")
+    print(f"行ごと集計:     {legacy_sec:7.3f}s  {args.rows / legacy_sec / 1e6:6.2f}M行/s")
+    print(f"ベクトル化集計: {vectorized_sec:7.3f}s  {args.rows / vectorized_sec / 1e6:6.2f}M行/s"
+          f"  (x{legacy_sec / vectorized_sec:.1f})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,4 @@
-import { useState, useEffect, useCallback } from 'react';
+import { useState, useEffect, useCallback, useRef } from 'react';
 import { Header } from './components/dashboard/Header';
 import { StatisticsSummary } from './components/dashboard/StatisticsSummary';
 import { WeeklyChartsGrid } from './components/dashboard/WeeklyChartsGrid';
@@ -37,22 +37,56 @@ function App() {
   // フィルタリングされたデータを計算
   const filteredData = dataProcessor.filterData(data, currentFilter);
 
+  // 生データ（CSV）は期間指定・詳細分析・エクスポートで必要になったときだけ読み込む
+  const [analysisRequested, setAnalysisRequested] = useState(false);
+
+  // loadData から現在のフィルター・生データを参照（依存に含めると切り替えのたびに再読み込みになるため）
+  const filterRef = useRef(currentFilter);
+  filterRef.current = currentFilter;
+  const dataRef = useRef(data);
+  dataRef.current = data;
+  const analysisRequestedRef = useRef(analysisRequested);
+  analysisRequestedRef.current = analysisRequested;
+
+  const loadRawData = useCallback(
+    async (forceReload = false) => {
+      console.log('🔄 Loading crowd data...');
+      const loadedData = await dataLoader.loadCSVData(forceReload);
+
+      if (loadedData.length === 0) {
+        // Get translations directly without dependency
+        const errorMsg = currentLanguage === 'ja' ? 'データが見つかりませんでした' : 'No data found';
+        throw new Error(errorMsg);
+      }
+
+      setData(loadedData);
+      return loadedData;
+    },
+    [dataLoader, currentLanguage],
+  );
+
   const loadData = useCallback(
     async (forceReload = false) => {
       setLoading(true);
       setError(null);
 
       try {
-        console.log('🔄 Loading crowd data...');
-        const loadedData = await dataLoader.loadCSVData(forceReload);
-
-        if (loadedData.length === 0) {
-          // Get translations directly without dependency
-          const errorMsg = currentLanguage === 'ja' ? 'データが見つかりませんでした' : 'No data found';
-          throw new Error(errorMsg);
+        // 全期間表示は集計済みペイロード（数KB）だけで描画し、CSVは取得しない
+        const needsRawData =
+          filterRef.current.period !== 'all' || analysisRequestedRef.current || dataRef.current.length > 0;
+        let aggregatesShown = false;
+        if (!needsRawData) {
+          const payload = await dataLoader.loadAggregates(forceReload);
+          if (payload) {
+            const stats = dataProcessor.statsFromAggregates(payload);
+            setWeeklyStats(stats.weeklyStats);
+            setOverallStats(stats.overallStats);
+            aggregatesShown = true;
+          }
+        }
+        if (!aggregatesShown) {
+          await loadRawData(forceReload);
         }
-
-        setData(loadedData);
 
         console.log('Data loaded and processed successfully');
 
@@ -76,9 +110,28 @@ function App() {
         setLoading(false);
       }
     },
-    [dataLoader, currentLanguage],
+    [dataLoader, dataProcessor, currentLanguage, loadRawData],
   );
 
+  // 集計表示中に生データが必要になった場合だけCSVを読み込む（失敗時も集計表示は維持）
+  const ensureRawData = useCallback(async (): Promise<CrowdData[] | null> => {
+    if (dataRef.current.length > 0) {
+      return dataRef.current;
+    }
+    setLoading(true);
+    try {
+      return await loadRawData();
+    } catch (err) {
+      console.error('❌ Error loading data:', err);
+      const errorMessage = err instanceof Error ? err.message : 
+        (currentLanguage === 'ja' ? 'データの読み込みに失敗しました' : 'Failed to load data');
+      ExportUtils.showToast(errorMessage, 'warning');
+      return null;
+    } finally {
+      setLoading(false);
+    }
+  }, [loadRawData, currentLanguage]);
+
   const handleRefresh = () => {
     loadData(true);
   };
@@ -89,26 +142,28 @@ function App() {
     ExportUtils.showToast(t('filterApplied'), 'success');
   };
 
-  const handleExportJSON = () => {
-    if (!overallStats || weeklyStats.length === 0) {
+  const handleExportJSON = async () => {
+    const rows = await ensureRawData();
+    if (!rows || !overallStats || weeklyStats.length === 0) {
       const msg = currentLanguage === 'ja' ? 'エクスポートするデータがありません' : 'No data to export';
       ExportUtils.showToast(msg, 'warning');
       return;
     }
 
-    ExportUtils.exportToJSON(data, overallStats, weeklyStats);
+    ExportUtils.exportToJSON(rows, overallStats, weeklyStats);
     const msg = currentLanguage === 'ja' ? 'JSONファイルをダウンロードしました' : 'JSON file downloaded';
     ExportUtils.showToast(msg, 'success');
   };
 
-  const handleExportCSV = () => {
-    if (data.length === 0) {
+  const handleExportCSV = async () => {
+    const rows = await ensureRawData();
+    if (!rows) {
       const msg = currentLanguage === 'ja' ? 'エクスポートするデータがありません' : 'No data to export';
       ExportUtils.showToast(msg, 'warning');
       return;
     }
 
-    ExportUtils.exportToCSV(data);
+    ExportUtils.exportToCSV(rows);
     const msg = currentLanguage === 'ja' ? 'CSVファイルをダウンロードしました' : 'CSV file downloaded';
     ExportUtils.showToast(msg, 'success');
   };
@@ -117,6 +172,13 @@ function App() {
     loadData();
   }, [loadData]);
 
+  // 期間指定・詳細分析の表示時に生データを読み込む
+  useEffect(() => {
+    if (currentFilter.period !== 'all' || analysisRequested) {
+      ensureRawData();
+    }
+  }, [currentFilter.period, analysisRequested, ensureRawData]);
+
   // Re-process data when filter changes
   useEffect(() => {
     if (data.length > 0) {
@@ -204,7 +266,19 @@ function App() {
 
               {/* Data Insights */}
               <section>
-                <DataInsights data={filteredData} currentFilter={currentFilter} language={currentLanguage} />
+                {data.length > 0 ? (
+                  <DataInsights data={filteredData} currentFilter={currentFilter} language={currentLanguage} />
+                ) : (
+                  <div className="flex flex-col items-center space-y-3 mt-8">
+                    <p className="text-base text-gray-600">{t('detailedAnalysisNote')}</p>
+                    <Button
+                      onClick={() => setAnalysisRequested(true)}
+                      className="min-h-[44px] px-6 bg-blue-600 hover:bg-blue-700 text-white font-medium"
+                    >
+                      {t('showDetailedAnalysis')}
+                    </Button>
+                  </div>
+                )}
               </section>
 
               {/* Charts Grid */}
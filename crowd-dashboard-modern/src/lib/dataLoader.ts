@@ -21,10 +21,36 @@ export interface ProcessedData {
   dataPoints: number;
 }
 
+export interface WeekdayAggregates {
+  count: number[];
+  mean: (number | null)[];
+  min: (number | null)[];
+  max: (number | null)[];
+  std: (number | null)[];
+  p50?: (number | null)[];
+  p90?: (number | null)[];
+  p99?: (number | null)[];
+}
+
+// パイプラインが出力する曜日×時間帯の集計済みペイロード（crowd_aggregates.json）
+export interface AggregatePayload {
+  version: number;
+  data_version: string;
+  generated_at: string;
+  total_records: number;
+  date_range: { start: string | null; end: string | null; latest: string | null };
+  status_counts: Record<string, number>;
+  weekdays: Record<string, WeekdayAggregates>;
+}
+
+export const AGGREGATES_VERSION = 1;
+
 export class DataLoader {
   private static instance: DataLoader;
   private cachedData: CrowdData[] = [];
   private lastLoadTime: number = 0;
+  private cachedAggregates: AggregatePayload | null = null;
+  private lastAggregatesLoadTime: number = 0;
   private readonly CACHE_DURATION = 5 * 60 * 1000; // 5 minutes
 
   static getInstance(): DataLoader {
@@ -84,6 +110,37 @@ export class DataLoader {
     }
   }
 
+  // 集計済みペイロードを読み込む（存在しない・形式が異なる場合はnull）
+  async loadAggregates(forceReload = false): Promise<AggregatePayload | null> {
+    const now = Date.now();
+
+    if (!forceReload && this.cachedAggregates && now - this.lastAggregatesLoadTime < this.CACHE_DURATION) {
+      return this.cachedAggregates;
+    }
+
+    try {
+      const response = await fetch('/crowd_aggregates.json');
+
+      if (!response.ok) {
+        throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+      }
+
+      const payload = (await response.json()) as AggregatePayload;
+      if (payload.version !== AGGREGATES_VERSION) {
+        throw new Error(`Unsupported aggregates version: ${payload.version}`);
+      }
+
+      this.cachedAggregates = payload;
+      this.lastAggregatesLoadTime = now;
+
+      console.log(`✅ Loaded aggregates v${payload.data_version} (${payload.total_records} records)`);
+      return payload;
+    } catch (error) {
+      console.warn('⚠️ Aggregates unavailable, using CSV only:', error);
+      return null;
+    }
+  }
+
   private cleanAndValidateData(data: CrowdData[]): CrowdData[] {
     return data
       .filter((item) => {
@@ -126,6 +183,8 @@ export class DataLoader {
   clearCache(): void {
     this.cachedData = [];
     this.lastLoadTime = 0;
+    this.cachedAggregates = null;
+    this.lastAggregatesLoadTime = 0;
     console.log('🧹 Cache cleared');
   }
 }
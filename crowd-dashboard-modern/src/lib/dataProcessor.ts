@@ -1,4 +1,4 @@
-import type { CrowdData, ProcessedData } from './dataLoader';
+import type { AggregatePayload, CrowdData, ProcessedData } from './dataLoader';
 import type { FilterState } from '../types/filter';
 
 export interface WeeklyStats {
@@ -134,6 +134,105 @@ export class DataProcessor {
     }));
   }
 
+  // 集計済みペイロードから全期間の曜日別・全体統計を算出（processWeeklyData / calculateOverallStats と同じ結果）
+  statsFromAggregates(payload: AggregatePayload): { weeklyStats: WeeklyStats[]; overallStats: OverallStats } {
+    const weekdays = ['日曜日', '月曜日', '火曜日', '水曜日', '木曜日', '金曜日', '土曜日'];
+    const englishDays = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday'];
+    const hourlyTotals = Array.from({ length: 24 }, () => ({ sum: 0, count: 0 }));
+
+    const weeklyStats = weekdays.map((weekday, index) => {
+      const englishDay = englishDays[index];
+      const cells = payload.weekdays[englishDay];
+      const hourlyData: ProcessedData[] = [];
+      let daySum = 0;
+      let dayCount = 0;
+
+      for (let hour = 0; hour < 24; hour++) {
+        const dataPoints = cells ? cells.count[hour] : 0;
+        const avgCount = dataPoints > 0 ? (cells.mean[hour] as number) : 0;
+        hourlyData.push({ weekday: '', hour, avgCount, dataPoints });
+        daySum += avgCount * dataPoints;
+        dayCount += dataPoints;
+        hourlyTotals[hour].sum += avgCount * dataPoints;
+        hourlyTotals[hour].count += dataPoints;
+      }
+
+      const peakHour = this.findPeakHour(hourlyData);
+      const quietHour = this.findQuietHour(hourlyData);
+
+      return {
+        weekday,
+        englishDay,
+        totalEntries: dayCount,
+        avgCrowdLevel: dayCount > 0 ? daySum / dayCount : 0,
+        peakHour: peakHour.hour,
+        peakCount: peakHour.count,
+        quietHour: quietHour.hour,
+        quietCount: quietHour.count,
+        hourlyData,
+      };
+    });
+
+    const peakWeekday = weeklyStats.reduce((peak, current) =>
+      current.avgCrowdLevel > peak.avgCrowdLevel ? current : peak,
+    );
+    const quietWeekday = weeklyStats.reduce((quiet, current) =>
+      current.avgCrowdLevel < quiet.avgCrowdLevel ? current : quiet,
+    );
+
+    let peakHour = 0;
+    let peakAvg = 0;
+    let quietHour = 0;
+    let quietAvg = Infinity;
+    let totalSum = 0;
+    let totalCount = 0;
+
+    hourlyTotals.forEach((totals, hour) => {
+      totalSum += totals.sum;
+      totalCount += totals.count;
+      // Only consider hours with sufficient data points (at least 2 samples)
+      if (totals.count >= 2) {
+        const avg = totals.sum / totals.count;
+        if (avg > peakAvg) {
+          peakAvg = avg;
+          peakHour = hour;
+        }
+        if (avg < quietAvg) {
+          quietAvg = avg;
+          quietHour = hour;
+        }
+      }
+    });
+
+    let empty = 0;
+    let moderate = 0;
+    let busy = 0;
+    Object.entries(payload.status_counts).forEach(([code, count]) => {
+      const level = Number(code);
+      if (level === 1) empty += count;
+      else if (level === 2) moderate += count;
+      else if (level >= 3) busy += count;
+    });
+    const distributionTotal = empty + moderate + busy;
+
+    return {
+      weeklyStats,
+      overallStats: {
+        totalEntries: totalCount,
+        averageCrowdLevel: totalCount > 0 ? totalSum / totalCount : 0,
+        peakWeekday: peakWeekday.weekday,
+        quietWeekday: quietWeekday.weekday,
+        peakHour,
+        quietHour,
+        crowdDistribution: {
+          empty: distributionTotal > 0 ? Math.round((empty / distributionTotal) * 100) : 0,
+          moderate: distributionTotal > 0 ? Math.round((moderate / distributionTotal) * 100) : 0,
+          busy: distributionTotal > 0 ? Math.round((busy / distributionTotal) * 100) : 0,
+        },
+      },
+    };
+  }
+
   private convertCrowdLevelToNumber(crowdLevel: string | number): number | null {
     // If it's already a number (status_code), use it directly
     if (typeof crowdLevel === 'number') {
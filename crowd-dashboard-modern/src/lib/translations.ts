@@ -65,6 +65,8 @@ export const translations = {
     lastTwoWeeksAnalysis: 'Analysis results from the past 2 weeks data',
     lastMonthAnalysis: 'Analysis results from the past month data',
     customPeriodAnalysis: 'Analysis results from custom period data',
+    showDetailedAnalysis: 'Show detailed analysis',
+    detailedAnalysisNote: 'Loads all records to analyze peak times and trends',
     
     // Chart sections
     timeAnalysis: 'Time Analysis',
@@ -206,6 +208,8 @@ export const translations = {
     lastTwoWeeksAnalysis: '過去2週間のデータから分析した結果',
     lastMonthAnalysis: '過去1ヶ月のデータから分析した結果',
     customPeriodAnalysis: 'カスタム期間のデータから分析した結果',
+    showDetailedAnalysis: '詳細分析を表示',
+    detailedAnalysisNote: '全記録を読み込んで、ピーク時間帯や傾向を分析します',
     
     // Chart sections
     timeAnalysis: '時間帯分析',
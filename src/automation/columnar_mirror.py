@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+混雑データの列指向ミラー（Parquet）
+- CSVと同内容を型付き列で保持（ラベル類は辞書エンコード）
+- 分析処理は必要な列だけを NumPy 配列として読み込む（行ごとの変換なし）
+- CSVへの追記時に追記分をセグメントとして書き足し、圧縮・エクスポート時に全体を再生成
+- 元CSVのサイズ・更新日時をマニフェストに記録し、CSVが外部で編集された場合のみ読み込み時に再生成
+- pyarrow 未インストール時はミラーを作らず、CSVから必要列のみを読む
+"""
+
+import csv
+import datetime as dt
+import importlib
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+
+from optional_deps import is_module_available
+
+PYARROW_AVAILABLE = is_module_available("pyarrow")
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# 列ごとの型（datetime: 日時, int: 整数, label: 辞書エンコード文字列, text: 文字列）
+COLUMN_KINDS = {
+    "datetime": "datetime",
+    "date": "label",
+    "time": "label",
+    "hour": "int8",
+    "weekday": "label",
+    "count": "int16",
+    "status_label": "label",
+    "status_code": "int8",
+    "status_min": "int16",
+    "status_max": "int16",
+    "raw_text": "text",
+}
+
+# 追記セグメントがこの数を超えたら基本ファイルに統合
+MAX_SEGMENTS = 32
+
+
+def parse_datetime(value):
+    """CSVの日時文字列を datetime に変換（不正値はNone）"""
+    try:
+        return dt.datetime.strptime(value, DATETIME_FORMAT)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_int(value):
+    """CSVの数値文字列を整数に変換（空・不正値はNone）"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def convert_value(column, value):
+    """列の型に合わせてCSVの値を変換"""
+    kind = COLUMN_KINDS[column]
+    if kind == "datetime":
+        return parse_datetime(value)
+    if kind.startswith("int"):
+        return parse_int(value)
+    return value
+
+
+def source_stamp(csv_path):
+    """元CSVのサイズ・更新日時（ミラーの鮮度判定用）"""
+    stat = os.stat(csv_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+class ColumnarMirror:
+    """CSVのParquetミラー（基本ファイル＋追記セグメント＋マニフェスト）"""
+
+    def __init__(self, path, logger=None):
+        self.path = Path(path)
+        self.manifest_path = self.path.with_name(self.path.name + ".json")
+        self.segments_dir = self.path.with_name(self.path.name + ".segments")
+        self.logger = logger or logging.getLogger(__name__)
+        self._pa = None
+        self._pq = None
+        self._pc = None
+        self._pacsv = None
+
+    @property
+    def available(self):
+        return PYARROW_AVAILABLE
+
+    def _import(self):
+        """pyarrow を遅延import"""
+        if self._pa is None:
+            self._pa = importlib.import_module("pyarrow")
+            self._pq = importlib.import_module("pyarrow.parquet")
+            self._pc = importlib.import_module("pyarrow.compute")
+            self._pacsv = importlib.import_module("pyarrow.csv")
+        return self._pa, self._pq
+
+    def _arrow_type(self, kind):
+        pa, _ = self._import()
+        if kind == "datetime":
+            return pa.timestamp("s")
+        if kind == "label":
+            return pa.dictionary(pa.int32(), pa.string())
+        if kind == "text":
+            return pa.string()
+        return getattr(pa, kind)()
+
+    def _schema(self):
+        pa, _ = self._import()
+        return pa.schema([pa.field(name, self._arrow_type(kind)) for name, kind in COLUMN_KINDS.items()])
+
+    # --- マニフェスト ---
+
+    def load_manifest(self):
+        """マニフェスト（元CSVのサイズ・更新日時、セグメント一覧、行数）。なければNone"""
+        try:
+            with self.manifest_path.open(encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_manifest(self, manifest):
+        tmp_file = self.manifest_path.with_suffix(".tmp")
+        with tmp_file.open("w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        shutil.move(str(tmp_file), str(self.manifest_path))
+
+    def _drop_manifest(self):
+        """ファイル差し替え中に中断しても不整合なミラーを読まないよう、先にマニフェストを消す"""
+        if self.manifest_path.exists():
+            self.manifest_path.unlink()
+
+    def _segment_paths(self, manifest):
+        return [self.segments_dir / name for name in manifest.get("segments", [])]
+
+    def is_fresh(self, csv_path):
+        """ミラーが現在のCSVと一致しているか"""
+        if not (self.available and self.path.exists() and Path(csv_path).exists()):
+            return False
+        manifest = self.load_manifest()
+        return (
+            manifest is not None
+            and manifest.get("source") == source_stamp(csv_path)
+            and all(path.exists() for path in self._segment_paths(manifest))
+        )
+
+    # --- 型変換（CSVの文字列列 → 型付き列、行ごとのループなし） ---
+
+    def _parse_datetimes(self, values):
+        pa, _ = self._import()
+        pc = self._pc
+        parsed = pc.strptime(values, format=DATETIME_FORMAT, unit="s", error_is_null=True)
+        # Arrowで解釈できなかった非空の値だけ Python の strptime で再解釈（ゼロ埋めなし等）
+        retry = pc.and_kleene(pc.is_null(parsed), pc.not_equal(values, "")).to_numpy(zero_copy_only=False)
+        if not retry.any():
+            return parsed
+        seconds = pc.cast(parsed, pa.int64()).to_pylist()
+        texts = values.to_pylist()
+        for index in retry.nonzero()[0].tolist():
+            timestamp = parse_datetime(texts[index])
+            if timestamp is not None:
+                seconds[index] = int(timestamp.replace(tzinfo=dt.timezone.utc).timestamp())
+        return pa.array(seconds, type=pa.int64()).cast(pa.timestamp("s"))
+
+    def _parse_ints(self, values, kind):
+        pa, _ = self._import()
+        pc = self._pc
+        trimmed = pc.utf8_trim_whitespace(values)
+        valid = pc.match_substring_regex(trimmed, r"^[+-]?[0-9]+$")
+        digits = pc.replace_substring_regex(trimmed, r"^\+", "")
+        return pc.cast(pc.if_else(valid, digits, pa.scalar(None, pa.string())), getattr(pa, kind)())
+
+    def _typed_table(self, strings):
+        """{列名: 文字列配列} を COLUMN_KINDS の型の Table に変換"""
+        pa, _ = self._import()
+        arrays = []
+        for name, kind in COLUMN_KINDS.items():
+            values = strings[name]
+            if kind == "datetime":
+                arrays.append(self._parse_datetimes(values))
+            elif kind == "label":
+                arrays.append(values.dictionary_encode())
+            elif kind == "text":
+                arrays.append(values)
+            else:
+                arrays.append(self._parse_ints(values, kind))
+        return pa.Table.from_arrays(arrays, schema=self._schema())
+
+    def _read_csv_strings(self, csv_path):
+        """CSVを pyarrow.csv で一括読み込み（全列を文字列のまま、欠けた列は空文字）"""
+        pa, _ = self._import()
+        pacsv = self._pacsv
+        table = pacsv.read_csv(
+            csv_path,
+            parse_options=pacsv.ParseOptions(newlines_in_values=True),
+            convert_options=pacsv.ConvertOptions(
+                column_types={name: pa.string() for name in COLUMN_KINDS},
+                include_columns=list(COLUMN_KINDS),
+                include_missing_columns=True,
+            ),
+        )
+        return {
+            name: self._pc.fill_null(table.column(name).combine_chunks(), "")
+            for name in COLUMN_KINDS
+        }
+
+    def _rows_strings(self, rows):
+        """CSV形式の行（dict）を {列名: 文字列配列} に変換"""
+        pa, _ = self._import()
+        strings = {}
+        for name in COLUMN_KINDS:
+            values = [row.get(name) for row in rows]
+            strings[name] = pa.array(["" if value is None else str(value) for value in values], type=pa.string())
+        return strings
+
+    # --- 書き込み ---
+
+    def _write_table(self, table, path):
+        """一時ファイルに書き込んでからアトミックに置き換え"""
+        _, pq = self._import()
+        tmp_file = path.with_suffix(".tmp")
+        try:
+            pq.write_table(table, tmp_file, compression="zstd")
+            shutil.move(str(tmp_file), str(path))
+        finally:
+            if tmp_file.exists():
+                tmp_file.unlink()
+
+    def _clear_segments(self):
+        if self.segments_dir.exists():
+            shutil.rmtree(self.segments_dir)
+
+    def _replace_base(self, table, stamp):
+        self._drop_manifest()
+        self._write_table(table, self.path)
+        self._clear_segments()
+        self._save_manifest({"source": stamp, "segments": [], "rows": table.num_rows, "next_segment": 1})
+
+    def rebuild(self, csv_path):
+        """CSVを pyarrow.csv で一括変換してミラーを再生成（圧縮・エクスポート・外部編集時）"""
+        if not self.available:
+            return False
+        try:
+            stamp = source_stamp(csv_path)
+            table = self._typed_table(self._read_csv_strings(csv_path))
+            self._replace_base(table, stamp)
+        except Exception as e:
+            self.logger.warning(f"列指向ミラー書き込みエラー: {e}")
+            return False
+        self.logger.info(f"🧱 列指向ミラーを更新: {table.num_rows}件")
+        return True
+
+    def append(self, rows, previous_stamp, csv_path):
+        """CSVへの追記分をセグメントとして追加
+
+        previous_stamp は追記前のCSVのサイズ・更新日時。ミラーが追記前のCSVと一致していなければ
+        （未生成・外部編集など）差分では追いつけないため全体を再生成する。
+        """
+        if not self.available:
+            return False
+        manifest = self.load_manifest()
+        if (
+            previous_stamp is None
+            or manifest is None
+            or manifest.get("source") != previous_stamp
+            or not self.path.exists()
+        ):
+            return self.rebuild(csv_path)
+        try:
+            if rows:
+                table = self._typed_table(self._rows_strings(rows))
+                number = manifest.get("next_segment", 1)
+                name = f"{number:06d}.parquet"
+                self.segments_dir.mkdir(parents=True, exist_ok=True)
+                self._write_table(table, self.segments_dir / name)
+                manifest["segments"] = manifest.get("segments", []) + [name]
+                manifest["next_segment"] = number + 1
+                manifest["rows"] = manifest.get("rows", 0) + table.num_rows
+            manifest["source"] = source_stamp(csv_path)
+            if len(manifest["segments"]) > MAX_SEGMENTS:
+                self._replace_base(self._read_table(manifest, list(COLUMN_KINDS)), manifest["source"])
+                self.logger.info(f"🧱 列指向ミラーのセグメントを統合: {manifest['rows']}件")
+            else:
+                self._save_manifest(manifest)
+        except Exception as e:
+            self.logger.warning(f"列指向ミラー追記エラー、再生成します: {e}")
+            return self.rebuild(csv_path)
+        return True
+
+    # --- 読み込み ---
+
+    def _read_table(self, manifest, columns):
+        pa, pq = self._import()
+        tables = [pq.read_table(path, columns=columns) for path in [self.path, *self._segment_paths(manifest)]]
+        return pa.concat_tables(tables) if len(tables) > 1 else tables[0]
+
+    def read_arrays(self, since=None, until=None):
+        """CrowdDataset.from_arrays 用の NumPy 配列を読み込む（行ごとのループなし）
+
+        日時・人数が欠けた行は除外し、ステータス列の欠損は 0 / 空ラベルとする。
+        since / until（"YYYY-MM-DD HH:MM:SS"、両端を含む）を指定すると期間内の行だけを返す。
+        """
+        pa, _ = self._import()
+        pc = self._pc
+        manifest = self.load_manifest()
+        if manifest is None:
+            raise FileNotFoundError(f"列指向ミラーのマニフェストがありません: {self.manifest_path}")
+        table = self._read_table(
+            manifest, ["datetime", "count", "status_code", "status_label", "status_min", "status_max"]
+        )
+        mask = pc.and_(pc.is_valid(table.column("datetime")), pc.is_valid(table.column("count")))
+        for bound, compare in ((since, pc.greater_equal), (until, pc.less_equal)):
+            if bound:
+                mask = pc.and_(mask, compare(table.column("datetime"), pa.scalar(parse_datetime(bound), pa.timestamp("s"))))
+        table = table.filter(mask)
+
+        def ints(name):
+            return pc.fill_null(table.column(name), 0).to_numpy()
+
+        labels = pc.fill_null(pc.cast(table.column("status_label"), pa.string()), "").combine_chunks()
+        encoded = labels.dictionary_encode()
+        return {
+            # Parquet に秒単位の時刻型はなくミリ秒で読み戻るため、秒に揃えてから整数化
+            "seconds": pc.cast(pc.cast(table.column("datetime"), pa.timestamp("s")), pa.int64()).to_numpy(),
+            "count": ints("count"),
+            "status_code": ints("status_code"),
+            "status_min": ints("status_min"),
+            "status_max": ints("status_max"),
+            "label_codes": encoded.indices.to_numpy(zero_copy_only=False),
+            "labels": encoded.dictionary.to_pylist(),
+        }
+
+
+def read_csv_columns(csv_path, columns):
+    """CSVから指定列だけを型変換して読み込む（pyarrow未導入時の代替）"""
+    result = {name: [] for name in columns}
+    if not Path(csv_path).exists():
+        return result
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            for name, values in result.items():
+                values.append(convert_value(name, row.get(name)))
+    return result
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+曜日×時間帯の混雑統計（NumPyによるベクトル化集計）
+- 型付き列（CrowdDataset）をゼロコピーでNumPy配列として参照
+- 件数・平均・中央値・最小・最大・標準偏差をソートなしで一括計算
+  （人数は小さな整数のため、バケット×人数のヒストグラムから順序統計量を求める）
+- データのないバケットは件数0、その他の統計はNaN
+"""
+
+import numpy as np
+
+WEEKDAYS = 7
+HOURS = 24
+STAT_NAMES = ("count", "mean", "median", "min", "max", "std")
+
+
+def dataset_arrays(dataset):
+    """CrowdDataset の列をコピーせずにNumPy配列として返す"""
+    return {
+        "minute": np.frombuffer(dataset.minute, dtype=np.int64),
+        "hour": np.frombuffer(dataset.hour, dtype=np.uint8),
+        "weekday": np.frombuffer(dataset.weekday, dtype=np.uint8),
+        "count": np.frombuffer(dataset.count, dtype=np.uint16),
+        "status_code": np.frombuffer(dataset.status_code, dtype=np.uint8),
+    }
+
+
+def bucket_stats(buckets, values, n_buckets):
+    """バケットごとの統計を {統計名: 長さn_bucketsの配列} で返す（valuesは非負整数）"""
+    buckets = np.asarray(buckets, dtype=np.intp)
+    values = np.asarray(values, dtype=np.intp)
+
+    counts = np.bincount(buckets, minlength=n_buckets)
+    sums = np.bincount(buckets, weights=values, minlength=n_buckets)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / counts
+        # 平均からの偏差で分散を計算（二乗和からの引き算による桁落ちを避ける）
+        deviations = values - means[buckets]
+        variances = np.bincount(buckets, weights=deviations * deviations, minlength=n_buckets) / counts
+
+    # バケット×人数のヒストグラムの累積から最小・最大・中央値を取り出す
+    width = int(values.max()) + 1 if len(values) else 1
+    histogram = np.bincount(buckets * width + values, minlength=n_buckets * width).reshape(n_buckets, width)
+    cumulative = histogram.cumsum(axis=1)
+    present = counts > 0
+
+    def order_statistic(rank):
+        """各バケットで rank 番目（0始まり）に小さい値"""
+        return (cumulative > rank[:, None]).argmax(axis=1)
+
+    minimums = np.full(n_buckets, np.nan)
+    maximums = np.full(n_buckets, np.nan)
+    medians = np.full(n_buckets, np.nan)
+    minimums[present] = order_statistic(np.zeros(n_buckets, dtype=np.intp))[present]
+    maximums[present] = order_statistic(counts - 1)[present]
+    medians[present] = ((order_statistic((counts - 1) // 2) + order_statistic(counts // 2)) / 2)[present]
+
+    return {
+        "count": counts,
+        "mean": means,
+        "median": medians,
+        "min": minimums,
+        "max": maximums,
+        "std": np.sqrt(variances),
+    }
+
+
+def weekday_hour_grid(weekday, hour, count):
+    """曜日(0=月曜)×時間帯の 7×24 統計グリッドを返す"""
+    buckets = np.asarray(weekday, dtype=np.intp) * HOURS + np.asarray(hour, dtype=np.intp)
+    stats = bucket_stats(buckets, count, WEEKDAYS * HOURS)
+    return {name: values.reshape(WEEKDAYS, HOURS) for name, values in stats.items()}
+
+
+def hourly_profile(hour, count):
+    """曜日をまとめた時間帯別（24バケット）の統計を返す"""
+    return bucket_stats(hour, count, HOURS)
+
+
+def dataset_grid(dataset):
+    """CrowdDataset から 7×24 統計グリッドを計算"""
+    arrays = dataset_arrays(dataset)
+    return weekday_hour_grid(arrays["weekday"], arrays["hour"], arrays["count"])
+
+
+def dataset_hourly_profile(dataset):
+    """CrowdDataset から時間帯別の統計を計算"""
+    arrays = dataset_arrays(dataset)
+    return hourly_profile(arrays["hour"], arrays["count"])
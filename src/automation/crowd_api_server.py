@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+ダッシュボード向けローカルHTTP API（asyncio、標準ライブラリのみ）
+- GET /aggregates: 曜日×時間帯の集計済みペイロード（dashboard_payload と同じ形式）
+- GET /forecast: 今後7日間の15分枠の予測
+- GET /readings?since=2025-08-01[&until=...][&limit=N]: 期間内の記録（日時順）
+- GET /latest: 最新の記録
+- 応答はメモリ上のスナップショットから返し、保存先のバージョンが変わったときだけ再読み込み
+- ETag（データバージョン、gzip版は "-gz" 付き）付きで、If-None-Match 一致時は 304 を返す
+- Accept-Encoding で gzip が受け入れられる（q>0）場合は事前圧縮済みの本文を返す
+"""
+
+import asyncio
+import datetime as dt
+import gzip
+import hashlib
+import json
+import time
+from bisect import bisect_left
+from urllib.parse import parse_qs, urlsplit
+
+from crowd_dataset import to_epoch_minute
+from crowd_forecast import CrowdForecast, SLOT_MINUTES
+from crowd_query import CrowdIndex
+from dashboard_payload import build_payload
+from running_aggregates import DATETIME_FORMAT, RunningAggregates
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# 保存先のバージョン確認の最短間隔（秒）
+VERSION_CHECK_INTERVAL = 1.0
+READINGS_LIMIT = 5000
+MAX_HEADER_LINES = 100
+
+STATUS_TEXT = {
+    200: "OK",
+    304: "Not Modified",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    500: "Internal Server Error",
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _json_body(data):
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class CachedBody:
+    """事前に直列化・圧縮した応答本文とETag（gzip版はバイト列が異なるため別のETag）"""
+
+    def __init__(self, data, etag):
+        self.body = _json_body(data)
+        self.gzip_body = gzip.compress(self.body, mtime=0)
+        self.etag = etag
+        self.gzip_etag = etag[:-1] + '-gz"'
+
+
+def parse_minute_bound(value, end=False):
+    """"2025-08-01" / "2025-08-01T09:30" → エポック分の境界
+
+    開始はその時刻以降、終了はその時刻まで（日付のみの場合はその日の終わりまで）を含む半開区間の端。
+    """
+    try:
+        parsed = dt.datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPError(400, f"日時の形式が不正です: {value}")
+    if not end:
+        return to_epoch_minute(parsed)
+    if len(value) == len("2025-08-01"):
+        return to_epoch_minute(parsed + dt.timedelta(days=1))
+    return to_epoch_minute(parsed) + 1
+
+
+class CrowdSnapshot:
+    """ある時点の保存先の内容（索引・集計・予測、応答本文のキャッシュ）"""
+
+    def __init__(self, pipeline, version):
+        self.version = version
+        # 保存先のバージョンから ETag 用のデータバージョンを決める
+        self.data_version = hashlib.sha256(version.encode("utf-8")).hexdigest()[:16]
+
+        # 集計・予測は別プロセス（週次実行・watch）が更新したファイルから読み直す。
+        # スナップショット専用のインスタンスを作り、パイプラインの状態は変えずファイルにも書き戻さない
+        # （保存先と対応していなければメモリ上で再構築するだけで、保存は週次実行・watch に任せる）
+        source_rows = pipeline.store_row_count()
+        self.dataset = pipeline.load_dataset()
+        self.aggregates = RunningAggregates(pipeline.aggregates.path, logger=pipeline.logger)
+        if not self.aggregates.matches(source_rows):
+            self.aggregates.rebuild(self.dataset, source_rows)
+        self.forecast = CrowdForecast(pipeline.forecast.path, logger=pipeline.logger)
+        if not self.forecast.matches(source_rows):
+            self.forecast.rebuild(self.dataset, source_rows)
+        self.index = CrowdIndex(self.dataset)
+
+        self.aggregates_body = CachedBody(build_payload(self.aggregates), self.etag())
+        self.latest_body = CachedBody(self._latest(), self.etag())
+        self._forecast_body = None
+
+    def etag(self, suffix=""):
+        return f'"{self.data_version}{suffix}"'
+
+    def _reading(self, row):
+        dataset = self.dataset
+        return {
+            "datetime": dataset.datetime_at(row).strftime(DATETIME_FORMAT),
+            "count": dataset.count[row],
+            "status_code": dataset.status_code[row],
+            "status_label": dataset.label_at(row),
+            "status_min": dataset.status_min[row],
+            "status_max": dataset.status_max[row],
+        }
+
+    def _latest(self):
+        if not self.index.order:
+            return {"total_records": 0, "latest": None}
+        return {"total_records": len(self.dataset), "latest": self._reading(self.index.order[-1])}
+
+    def forecast_body(self):
+        """予測の応答（日付が変わると予測表の開始日が進むため、開始日ごとにキャッシュ）"""
+        days = self.forecast.forecast()
+        start = days[0][0].isoformat() if days else ""
+        if self._forecast_body is None or self._forecast_body.start != start:
+            body = CachedBody(
+                {
+                    "slot_minutes": SLOT_MINUTES,
+                    "days": [{"date": date.isoformat(), "slots": slots} for date, slots in days],
+                },
+                self.etag(f"-{start}"),
+            )
+            body.start = start
+            self._forecast_body = body
+        return self._forecast_body
+
+    def readings(self, query):
+        """期間内の記録（日時索引を bisect で切り出し）"""
+        params = {name: values[0] for name, values in parse_qs(query).items()}
+        try:
+            limit = max(0, min(int(params.get("limit", READINGS_LIMIT)), READINGS_LIMIT))
+        except ValueError:
+            raise HTTPError(400, "limit は整数で指定してください")
+        minutes = self.index.sorted_minutes
+        start = bisect_left(minutes, parse_minute_bound(params["since"])) if "since" in params else 0
+        end = bisect_left(minutes, parse_minute_bound(params["until"], end=True)) if "until" in params else len(minutes)
+        rows = self.index.order[start:max(start, min(end, start + limit))]
+        return CachedBody(
+            {
+                "since": params.get("since"),
+                "until": params.get("until"),
+                "count": len(rows),
+                "truncated": max(end - start, 0) > len(rows),
+                "readings": [self._reading(row) for row in rows],
+            },
+            self.etag(),
+        )
+
+
+class CrowdAPIServer:
+    """スナップショットから応答するHTTPサーバー"""
+
+    def __init__(self, pipeline, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.pipeline = pipeline
+        self.logger = pipeline.logger
+        self.host = host
+        self.port = port
+        self.snapshot = None
+        self._reload_lock = asyncio.Lock()
+        self._checked_at = 0.0
+
+    async def current_snapshot(self):
+        """保存先のバージョンが変わっていればスナップショットを再読み込み"""
+        now = time.monotonic()
+        if self.snapshot is not None and now - self._checked_at < VERSION_CHECK_INTERVAL:
+            return self.snapshot
+        async with self._reload_lock:
+            if self.snapshot is not None and time.monotonic() - self._checked_at < VERSION_CHECK_INTERVAL:
+                return self.snapshot
+            version = await asyncio.to_thread(self.pipeline.store_version)
+            if self.snapshot is None or self.snapshot.version != version:
+                started = time.perf_counter()
+                self.snapshot = await asyncio.to_thread(CrowdSnapshot, self.pipeline, version)
+                self.logger.info(
+                    f"🔄 APIスナップショットを読み込み: {len(self.snapshot.dataset)}件 "
+                    f"v{self.snapshot.data_version} ({(time.perf_counter() - started) * 1000:.0f}ms)"
+                )
+            self._checked_at = time.monotonic()
+            return self.snapshot
+
+    async def route(self, path, query):
+        snapshot = await self.current_snapshot()
+        if path == "/aggregates":
+            return snapshot.aggregates_body
+        if path == "/forecast":
+            return snapshot.forecast_body()
+        if path == "/readings":
+            return snapshot.readings(query)
+        if path == "/latest":
+            return snapshot.latest_body
+        raise HTTPError(404, f"不明なパス: {path}")
+
+    @staticmethod
+    def _etag_matches(header, cached):
+        """If-None-Match が本文のいずれかの表現（非圧縮・gzip）のETagと一致するか"""
+        if not header:
+            return False
+        candidates = [value.strip().removeprefix("W/") for value in header.split(",")]
+        return "*" in candidates or cached.etag in candidates or cached.gzip_etag in candidates
+
+    @staticmethod
+    def _accepts_gzip(header):
+        """Accept-Encoding が gzip を受け入れるか（q=0 は拒否、gzip の指定がなければ * に従う）"""
+        qualities = {}
+        for part in (header or "").split(","):
+            coding, *params = [value.strip() for value in part.split(";")]
+            if not coding:
+                continue
+            quality = 1.0
+            for param in params:
+                name, _, value = param.partition("=")
+                if name.strip().lower() == "q":
+                    try:
+                        quality = float(value)
+                    except ValueError:
+                        quality = 0.0
+            qualities[coding.lower()] = quality
+        for coding in ("gzip", "x-gzip", "*"):
+            if coding in qualities:
+                return qualities[coding] > 0
+        return False
+
+    async def _read_request(self, reader):
+        request_line = (await reader.readline()).decode("latin-1").strip()
+        if not request_line:
+            return None
+        headers = {}
+        for _ in range(MAX_HEADER_LINES):
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        parts = request_line.split()
+        if len(parts) != 3:
+            raise HTTPError(400, "不正なリクエスト行")
+        return parts[0], parts[1], headers
+
+    async def handle(self, reader, writer):
+        status, body, extra_headers, method = 200, b"", {}, "GET"
+        try:
+            request = await self._read_request(reader)
+            if request is None:
+                return
+            method, target, headers = request
+            if method not in ("GET", "HEAD"):
+                raise HTTPError(405, f"未対応のメソッド: {method}")
+            url = urlsplit(target)
+            cached = await self.route(url.path, url.query)
+            use_gzip = self._accepts_gzip(headers.get("accept-encoding"))
+            extra_headers["ETag"] = cached.gzip_etag if use_gzip else cached.etag
+            extra_headers["Cache-Control"] = "no-cache"
+            if self._etag_matches(headers.get("if-none-match"), cached):
+                status = 304
+            elif use_gzip:
+                body = cached.gzip_body
+                extra_headers["Content-Encoding"] = "gzip"
+            else:
+                body = cached.body
+            extra_headers["Vary"] = "Accept-Encoding"
+        except HTTPError as e:
+            status, body = e.status, _json_body({"error": str(e)})
+        except Exception as e:
+            self.logger.error(f"APIエラー: {e}")
+            status, body = 500, _json_body({"error": "internal error"})
+
+        head = [
+            f"HTTP/1.1 {status} {STATUS_TEXT[status]}",
+            "Content-Type: application/json; charset=utf-8",
+            f"Content-Length: {len(body) if status != 304 else 0}",
+            "Access-Control-Allow-Origin: *",
+            "Connection: close",
+        ]
+        head.extend(f"{name}: {value}" for name, value in extra_headers.items())
+        try:
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+            if status != 304 and method != "HEAD":
+                writer.write(body)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve_forever(self):
+        await self.current_snapshot()
+        server = await asyncio.start_server(self.handle, self.host, self.port)
+        self.logger.info(f"🌐 APIサーバー起動: http://{self.host}:{self.port} (/aggregates, /forecast, /readings, /latest)")
+        async with server:
+            await server.serve_forever()
+
+
+def serve(pipeline, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """APIサーバーを起動（Ctrl+Cで停止）"""
+    try:
+        asyncio.run(CrowdAPIServer(pipeline, host, port).serve_forever())
+    except KeyboardInterrupt:
+        pipeline.logger.info("🛑 APIサーバーを停止しました")
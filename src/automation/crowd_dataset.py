@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+混雑データの型付き列表現
+- 1行あたり約20バイトの array 列（dict＋文字列の行表現に比べて大幅に省メモリ）
+  minute: エポック分(int64), hour / weekday / status_code: uint8,
+  count / status_min / status_max: uint16, status_label: ラベル表への添字(uint16)
+- 整数の再パースを不要にし、分析処理は列をそのまま走査する
+- DatasetSnapshot: 1回の実行で各段が共有するデータセット（読み込みは1回、コミット分は差分追加）
+"""
+
+import datetime as dt
+import sys
+from array import array
+
+from columnar_mirror import convert_value
+
+EPOCH_ORDINAL = dt.date(1970, 1, 1).toordinal()
+MINUTES_PER_DAY = 1440
+
+WEEKDAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def to_epoch_minute(value):
+    """datetime をエポック分（現地時刻のまま）に変換"""
+    return (value.toordinal() - EPOCH_ORDINAL) * MINUTES_PER_DAY + value.hour * 60 + value.minute
+
+
+def from_epoch_minute(minute):
+    """エポック分を datetime に戻す"""
+    days, minute_of_day = divmod(minute, MINUTES_PER_DAY)
+    date = dt.date.fromordinal(days + EPOCH_ORDINAL)
+    return dt.datetime(date.year, date.month, date.day, minute_of_day // 60, minute_of_day % 60)
+
+
+def reading_key(timestamp, count):
+    """重複判定キー（秒単位の日時＋人数）を整数1つに詰める（人数は3桁まで）"""
+    return ((to_epoch_minute(timestamp) * 60 + timestamp.second) << 10) | count
+
+
+class CrowdDataset:
+    """読み込み済み混雑データの列指向・型付き表現"""
+
+    # 構築に必要な列（ColumnarMirror / read_csv_columns の列名）
+    COLUMNS = ["datetime", "count", "status_code", "status_label", "status_min", "status_max"]
+
+    def __init__(self):
+        self.minute = array("q")
+        self.hour = array("B")
+        self.weekday = array("B")
+        self.count = array("H")
+        self.status_code = array("B")
+        self.status_min = array("H")
+        self.status_max = array("H")
+        self.status_label = array("H")
+        # ステータスラベル表（辞書エンコード、文字列はintern済み）
+        self.labels = []
+        self._label_ids = {}
+
+    def __len__(self):
+        return len(self.minute)
+
+    @classmethod
+    def from_columns(cls, columns):
+        """read_columns() の結果（型変換済みの列）から構築"""
+        dataset = cls()
+        for values in zip(*(columns[name] for name in cls.COLUMNS)):
+            dataset.append(*values)
+        return dataset
+
+    @classmethod
+    def from_arrays(cls, seconds, count, status_code, status_min, status_max, label_codes, labels):
+        """ColumnarMirror.read_arrays() の NumPy 配列から構築（行ごとのループなし）
+
+        seconds はエポック秒（現地時刻のまま）、label_codes は labels への添字。
+        """
+        import numpy as np
+
+        dataset = cls()
+        minute = np.asarray(seconds, dtype=np.int64) // 60
+        columns = (
+            (dataset.minute, minute),
+            (dataset.hour, minute % MINUTES_PER_DAY // 60),
+            (dataset.weekday, (minute // MINUTES_PER_DAY + 3) % 7),
+            (dataset.count, count),
+            (dataset.status_code, status_code),
+            (dataset.status_min, status_min),
+            (dataset.status_max, status_max),
+            (dataset.status_label, label_codes),
+        )
+        for column, values in columns:
+            column.frombytes(np.asarray(values).astype(column.typecode).tobytes())
+        dataset.labels = [sys.intern(label) for label in labels]
+        dataset._label_ids = {label: label_id for label_id, label in enumerate(dataset.labels)}
+        return dataset
+
+    @classmethod
+    def from_rows(cls, rows):
+        """CSV形式の行（値は文字列）から構築"""
+        dataset = cls()
+        for row in rows:
+            dataset.add_row(row)
+        return dataset
+
+    def add_row(self, row):
+        """CSV形式の行を型変換して追加"""
+        return self.append(*(convert_value(name, row.get(name)) for name in self.COLUMNS))
+
+    def _label_id(self, label):
+        label_id = self._label_ids.get(label)
+        if label_id is None:
+            label_id = len(self.labels)
+            self.labels.append(sys.intern(label))
+            self._label_ids[label] = label_id
+        return label_id
+
+    def append(self, timestamp, count, status_code=None, status_label="", status_min=None, status_max=None):
+        """1レコードを追加（日時・人数が欠けた行は追加せずFalse）"""
+        if timestamp is None or count is None:
+            return False
+        self.minute.append(to_epoch_minute(timestamp))
+        self.hour.append(timestamp.hour)
+        self.weekday.append(timestamp.weekday())
+        self.count.append(count)
+        self.status_code.append(status_code or 0)
+        self.status_min.append(status_min or 0)
+        self.status_max.append(status_max or 0)
+        self.status_label.append(self._label_id(status_label or ""))
+        return True
+
+    def datetime_at(self, index):
+        return from_epoch_minute(self.minute[index])
+
+    def label_at(self, index):
+        return self.labels[self.status_label[index]]
+
+    def earliest(self):
+        """最古の日時（データなしはNone）"""
+        return from_epoch_minute(min(self.minute)) if self.minute else None
+
+    def latest(self):
+        """最新の日時（データなしはNone）"""
+        return from_epoch_minute(max(self.minute)) if self.minute else None
+
+    def nbytes(self):
+        """列データの使用メモリ（バイト、ラベル表を除く）"""
+        columns = (
+            self.minute, self.hour, self.weekday, self.count,
+            self.status_code, self.status_min, self.status_max, self.status_label,
+        )
+        return sum(column.itemsize * len(column) for column in columns)
+
+
+class DatasetSnapshot(CrowdDataset):
+    """1回の実行で共有するデータセット（重複判定キーも保持）"""
+
+    def __init__(self):
+        super().__init__()
+        self.keys = set()
+
+    def append(self, timestamp, count, *args, **kwargs):
+        if not super().append(timestamp, count, *args, **kwargs):
+            return False
+        self.keys.add(reading_key(timestamp, count))
+        return True
+
+    @classmethod
+    def from_arrays(cls, seconds, count, *args, **kwargs):
+        import numpy as np
+
+        dataset = super().from_arrays(seconds, count, *args, **kwargs)
+        keys = (np.asarray(seconds, dtype=np.int64) << 10) | np.asarray(count, dtype=np.int64)
+        dataset.keys = set(keys.tolist())
+        return dataset
+
+    def is_new(self, row):
+        """CSV形式の行が未登録か（日時・人数が不正な行は判定できないため新規扱い）"""
+        timestamp = convert_value("datetime", row.get("datetime"))
+        count = convert_value("count", row.get("count"))
+        if timestamp is None or count is None:
+            return True
+        return reading_key(timestamp, count) not in self.keys
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+混雑予測（15分枠、今後7日間）
+- 曜日×15分枠の季節プロファイル（指数平滑）＋日次の水準・傾向（減衰トレンド付きHolt法）
+- コミットされた新しい行だけで状態を増分更新し、全件の再学習は不要
+- 予測は保存時に 7日×96枠 の表として事前計算し、参照は添字計算のみ
+- 学習時点の保存先の行数を記録し、一致しなければ全件から再学習
+"""
+
+import datetime as dt
+import json
+import logging
+import shutil
+import threading
+from pathlib import Path
+
+from columnar_mirror import convert_value
+from crowd_dataset import MINUTES_PER_DAY, EPOCH_ORDINAL, to_epoch_minute
+
+FORMAT_VERSION = 1
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = MINUTES_PER_DAY // SLOT_MINUTES
+WEEKDAYS = 7
+HORIZON_DAYS = 7
+
+# 平滑化係数（水準・傾向は日単位、季節は枠ごとの観測単位）
+ALPHA = 0.3
+BETA = 0.1
+GAMMA = 0.05
+# 傾向の減衰率（先の日ほど傾向の寄与を弱める）
+PHI = 0.9
+
+
+def slot_of(minute):
+    """エポック分 → (日番号, 曜日×15分枠の添字)"""
+    day, minute_of_day = divmod(minute, MINUTES_PER_DAY)
+    # 1970-01-01 は木曜日（0=月曜）
+    weekday = (day + 3) % WEEKDAYS
+    return day, weekday * SLOTS_PER_DAY + minute_of_day // SLOT_MINUTES
+
+
+def day_to_date(day):
+    return dt.date.fromordinal(day + EPOCH_ORDINAL)
+
+
+def date_to_day(date):
+    return date.toordinal() - EPOCH_ORDINAL
+
+
+def _initial_state():
+    return {
+        "seasonal": [None] * (WEEKDAYS * SLOTS_PER_DAY),
+        "seasonal_n": [0] * (WEEKDAYS * SLOTS_PER_DAY),
+        "level": None,
+        "trend": 0.0,
+        "level_day": None,
+        # 集計中の日（季節成分を除いた値の合計・件数）
+        "open_day": None,
+        "open_sum": 0.0,
+        "open_n": 0,
+        "last_minute": None,
+    }
+
+
+class CrowdForecast:
+    """15分枠の混雑予測モデル（増分学習・予測表の事前計算）"""
+
+    def __init__(self, path, logger=None):
+        self.path = Path(path)
+        self.logger = logger or logging.getLogger(__name__)
+        self._lock = threading.RLock()
+        self._state = None
+        self._source_rows = -1
+        self._table_start = None
+        self._table = []
+        self._dirty = False
+
+    def _load(self):
+        """モデルファイルを読み込み（初回のみ）"""
+        if self._state is None:
+            self._state = _initial_state()
+            if self.path.exists():
+                try:
+                    with self.path.open(encoding="utf-8") as f:
+                        saved = json.load(f)
+                    if saved.get("version") == FORMAT_VERSION:
+                        self._state = saved["state"]
+                        self._source_rows = saved["source_rows"]
+                        self._table_start = saved["table_start"]
+                        self._table = saved["table"]
+                except Exception as e:
+                    self.logger.warning(f"予測モデルの読み込みエラー: {e}")
+        return self._state
+
+    def matches(self, source_rows):
+        """モデルが保存先の現在の行数と対応しているか"""
+        with self._lock:
+            self._load()
+            return self._source_rows == source_rows
+
+    @staticmethod
+    def _damped(trend, days):
+        """減衰トレンドの days 日分の累積寄与"""
+        if days <= 0:
+            return 0.0
+        return trend * PHI * (1 - PHI ** days) / (1 - PHI)
+
+    def _base(self, day):
+        """指定日の水準の見込み（季節成分を除く）"""
+        state = self._state
+        if state["level"] is None:
+            return 0.0
+        return state["level"] + self._damped(state["trend"], day - state["level_day"])
+
+    def _close_day(self):
+        """集計中の日を締めて水準・傾向を更新"""
+        state = self._state
+        if state["open_n"]:
+            observed = state["open_sum"] / state["open_n"]
+            if state["level"] is None:
+                state["level"] = observed
+                state["trend"] = 0.0
+            else:
+                gap = state["open_day"] - state["level_day"]
+                predicted = self._base(state["open_day"])
+                level = predicted + ALPHA * (observed - predicted)
+                state["trend"] = BETA * (level - state["level"]) / gap + (1 - BETA) * state["trend"]
+                state["level"] = level
+            state["level_day"] = state["open_day"]
+        state["open_sum"] = 0.0
+        state["open_n"] = 0
+
+    def observe(self, minute, count):
+        """1件（エポック分・人数）を時刻順に反映"""
+        state = self._load()
+        day, key = slot_of(minute)
+        if state["open_day"] is None:
+            state["open_day"] = day
+        elif day > state["open_day"]:
+            self._close_day()
+            state["open_day"] = day
+
+        seasonal = state["seasonal"][key]
+        if seasonal is not None and day == state["open_day"]:
+            # 季節成分を除いた値で当日の水準を集計（過去日の遅れて届いた行は季節成分のみに反映）
+            state["open_sum"] += count - seasonal
+            state["open_n"] += 1
+
+        n = state["seasonal_n"][key] + 1
+        residual = count - self._base(day)
+        # 観測数が少ないうちは単純平均、以降は指数平滑
+        rate = max(GAMMA, 1.0 / n)
+        state["seasonal"][key] = residual if seasonal is None else seasonal + rate * (residual - seasonal)
+        state["seasonal_n"][key] = n
+        if state["last_minute"] is None or minute > state["last_minute"]:
+            state["last_minute"] = minute
+
+    def add_rows(self, rows):
+        """コミットされたCSV形式の行を時刻順に反映（日時・人数が不正な行も保存先の行数には数える）"""
+        readings = []
+        for row in rows:
+            timestamp = convert_value("datetime", row.get("datetime"))
+            count = convert_value("count", row.get("count"))
+            if timestamp is not None and count is not None:
+                readings.append((to_epoch_minute(timestamp), count))
+        readings.sort()
+        with self._lock:
+            self._load()
+            for minute, count in readings:
+                self.observe(minute, count)
+            self._source_rows += len(rows)
+            self._dirty = True
+
+    def rebuild(self, dataset, source_rows):
+        """全件（CrowdDataset）から再学習"""
+        minutes = dataset.minute
+        counts = dataset.count
+        order = sorted(range(len(minutes)), key=minutes.__getitem__)
+        with self._lock:
+            self._state = _initial_state()
+            for index in order:
+                self.observe(minutes[index], counts[index])
+            self._source_rows = source_rows
+            self._dirty = True
+        self.logger.info(f"🔮 予測モデルを再学習: {len(dataset)}件")
+
+    def _build_table(self, start_day):
+        """start_day から HORIZON_DAYS 日分の予測表（観測のない枠は None）"""
+        state = self._state
+        table = []
+        for day in range(start_day, start_day + HORIZON_DAYS):
+            base = self._base(day)
+            weekday = (day + 3) % WEEKDAYS
+            for key in range(weekday * SLOTS_PER_DAY, (weekday + 1) * SLOTS_PER_DAY):
+                if state["seasonal_n"][key]:
+                    table.append(round(max(0.0, base + state["seasonal"][key]), 1))
+                else:
+                    table.append(None)
+        return table
+
+    def refresh_table(self, today=None):
+        """予測表を最新の観測日（または今日の遅い方）から再計算"""
+        with self._lock:
+            state = self._load()
+            if state["last_minute"] is None:
+                self._table_start = None
+                self._table = []
+                return
+            start_day = state["last_minute"] // MINUTES_PER_DAY
+            start_day = max(start_day, date_to_day(today or dt.date.today()))
+            if self._table_start != start_day or self._dirty:
+                self._table_start = start_day
+                self._table = self._build_table(start_day)
+                self._dirty = True
+
+    def predict(self, when):
+        """指定日時の15分枠の予測人数（予測期間外・観測のない枠は None）"""
+        with self._lock:
+            self._load()
+            table = self._table
+            start = self._table_start
+        if start is None:
+            return None
+        index = ((when.toordinal() - EPOCH_ORDINAL - start) * SLOTS_PER_DAY
+                 + (when.hour * 60 + when.minute) // SLOT_MINUTES)
+        if 0 <= index < len(table):
+            return table[index]
+        return None
+
+    def forecast(self):
+        """予測表を [(日付, [96枠の予測人数])] で返す"""
+        with self._lock:
+            self.refresh_table()
+            if self._table_start is None:
+                return []
+            return [
+                (day_to_date(self._table_start + offset),
+                 self._table[offset * SLOTS_PER_DAY:(offset + 1) * SLOTS_PER_DAY])
+                for offset in range(len(self._table) // SLOTS_PER_DAY)
+            ]
+
+    def save(self):
+        """変更があれば予測表を再計算してモデルファイルをアトミックに保存"""
+        with self._lock:
+            if not self._dirty:
+                return
+            self.refresh_table()
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.path.with_suffix(".tmp")
+            try:
+                with tmp_file.open("w", encoding="utf-8") as f:
+                    json.dump(
+                        {
+                            "version": FORMAT_VERSION,
+                            "source_rows": self._source_rows,
+                            "state": self._state,
+                            "table_start": self._table_start,
+                            "table": self._table,
+                        },
+                        f,
+                    )
+                shutil.move(str(tmp_file), str(self.path))
+                self._dirty = False
+            except Exception as e:
+                if tmp_file.exists():
+                    tmp_file.unlink()
+                self.logger.warning(f"予測モデルの保存エラー: {e}")
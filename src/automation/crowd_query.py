@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+混雑データの索引付き検索
+- 日時順の索引: 日時でソートした行番号（期間指定は bisect で範囲を切り出し）
+- 曜日×時間帯の索引: バケットごとに日時順の行番号（曜日・時間帯指定は該当バケットのみを bisect）
+- 索引で絞り込んだ候補だけを走査してステータス条件を判定し、走査行数を報告
+- ステータスはコード・表記（混雑 / 混んでいます など）のどちらでも指定可能
+"""
+
+import datetime as dt
+import re
+import unicodedata
+from bisect import bisect_left
+
+from crowd_dataset import WEEKDAY_NAMES, to_epoch_minute
+
+HOURS = 24
+
+# 曜日指定に使える表記（0=月曜）
+WEEKDAY_ALIASES = {}
+for _index, _name in enumerate(WEEKDAY_NAMES):
+    WEEKDAY_ALIASES[_name.lower()] = _index
+    WEEKDAY_ALIASES[_name[:3].lower()] = _index
+    WEEKDAY_ALIASES["月火水木金土日"[_index]] = _index
+    WEEKDAY_ALIASES[str(_index)] = _index
+
+def normalize_status(value):
+    """表記ゆれを吸収（全角・半角の統一、"（~40人）" などの人数目安と空白を除去）"""
+    value = unicodedata.normalize("NFKC", value)
+    return re.sub(r"\(.*?\)|\s", "", value)
+
+
+def parse_weekdays(value):
+    """"Sun" / "sat,sun" / "土,日" → 曜日番号の集合（未指定は None）"""
+    if not value:
+        return None
+    weekdays = set()
+    for part in value.split(","):
+        key = part.strip().lower().removesuffix("曜日").removesuffix("曜")
+        if key not in WEEKDAY_ALIASES:
+            raise ValueError(f"不明な曜日: {part}")
+        weekdays.add(WEEKDAY_ALIASES[key])
+    return weekdays
+
+
+def parse_hours(value):
+    """"9-14"（両端を含む）/ "19" / "22-2"（日付またぎ）→ 時の集合（未指定は None）"""
+    if not value:
+        return None
+    hours = set()
+    for part in value.split(","):
+        start, _, end = part.strip().partition("-")
+        try:
+            start = int(start)
+            end = int(end) if end else start
+        except ValueError:
+            raise ValueError(f"時間帯の形式が不正です: {part}（例: 9-14）")
+        if not (0 <= start < HOURS and 0 <= end < HOURS):
+            raise ValueError(f"時間帯は0〜23で指定してください: {part}")
+        hour = start
+        hours.add(hour)
+        while hour != end:
+            hour = (hour + 1) % HOURS
+            hours.add(hour)
+    return hours
+
+
+def parse_date(value):
+    """"2025-08-01" → date（未指定は None）"""
+    if not value:
+        return None
+    try:
+        return dt.date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"日付の形式が不正です: {value}（例: 2025-08-01）")
+
+
+def parse_statuses(value, status_code=None):
+    """"3,4" / "混雑" → ステータスコード（int）・ラベルの部分一致語（str）の集合（未指定は None）
+
+    status_code（表記 → コード、判定できない表記は None）で変換できる表記はコードに変換し、
+    それ以外は正規化してラベルとの部分一致で判定する。
+    """
+    if not value:
+        return None
+    statuses = set()
+    for part in value.split(","):
+        part = normalize_status(part)
+        if not part:
+            continue
+        if part.isdigit():
+            statuses.add(int(part))
+        else:
+            code = status_code(part) if status_code else None
+            statuses.add(part if code is None else code)
+    return statuses or None
+
+
+class QueryResult:
+    """検索結果（該当行番号・走査行数・使用した索引）"""
+
+    def __init__(self, rows, scanned, plan):
+        self.rows = rows
+        self.scanned = scanned
+        self.plan = plan
+
+
+class CrowdIndex:
+    """CrowdDataset に対する日時順・曜日×時間帯の索引"""
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+        minute = dataset.minute
+        # 日時順の索引
+        self.order = sorted(range(len(dataset)), key=minute.__getitem__)
+        self.sorted_minutes = [minute[row] for row in self.order]
+        # 曜日×時間帯の索引（バケット内も日時順）
+        self.buckets = [[] for _ in range(len(WEEKDAY_NAMES) * HOURS)]
+        for row in self.order:
+            self.buckets[dataset.weekday[row] * HOURS + dataset.hour[row]].append(row)
+        self.bucket_minutes = [[minute[row] for row in bucket] for bucket in self.buckets]
+
+    @staticmethod
+    def _minute_range(since, until):
+        """期間（日付、両端を含む）→ エポック分の半開区間"""
+        low = to_epoch_minute(dt.datetime.combine(since, dt.time())) if since else None
+        high = to_epoch_minute(dt.datetime.combine(until + dt.timedelta(days=1), dt.time())) if until else None
+        return low, high
+
+    @staticmethod
+    def _slice(minutes, low, high):
+        start = bisect_left(minutes, low) if low is not None else 0
+        end = bisect_left(minutes, high) if high is not None else len(minutes)
+        return start, end
+
+    def _status_label_ids(self, words):
+        """部分一致語を含むラベルの添字（ラベル表は数種類のため行ごとではなく表に対して判定）"""
+        return {
+            label_id
+            for label_id, label in enumerate(self.dataset.labels)
+            if any(word in normalize_status(label) for word in words)
+        }
+
+    def query(self, weekdays=None, hours=None, since=None, until=None, statuses=None):
+        """条件に合う行を検索（曜日・時間帯指定時はバケット索引、それ以外は日時索引）"""
+        low, high = self._minute_range(since, until)
+        if weekdays is not None or hours is not None:
+            plan = "weekday_hour"
+            candidates = []
+            for weekday in sorted(weekdays if weekdays is not None else range(len(WEEKDAY_NAMES))):
+                for hour in sorted(hours if hours is not None else range(HOURS)):
+                    key = weekday * HOURS + hour
+                    start, end = self._slice(self.bucket_minutes[key], low, high)
+                    candidates.extend(self.buckets[key][start:end])
+        else:
+            plan = "datetime"
+            start, end = self._slice(self.sorted_minutes, low, high)
+            candidates = self.order[start:end]
+
+        if statuses:
+            codes = {status for status in statuses if isinstance(status, int)}
+            label_ids = self._status_label_ids([status for status in statuses if isinstance(status, str)])
+            status_code = self.dataset.status_code
+            status_label = self.dataset.status_label
+            rows = [row for row in candidates if status_code[row] in codes or status_label[row] in label_ids]
+        else:
+            rows = list(candidates)
+        return QueryResult(rows, len(candidates), plan)
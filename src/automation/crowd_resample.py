@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+不規則な記録の固定時間グリッドへのリサンプリング（NumPyによるベクトル化）
+- スクリーンショット時刻ごとの記録を、日×時間枠（5/15/60分など）の密な行列に変換
+- 補間方法: linear（線形）/ previous（直前の値）/ nearest（最も近い値）/ mean（枠内平均）
+- 記録の間隔が max_gap 分を超える区間は補間せずNaN（欠測）とする
+- searchsorted / bincount による一括処理で、行ごとのループを使わない
+"""
+
+import numpy as np
+
+from crowd_analytics import WEEKDAYS, dataset_arrays
+from crowd_dataset import MINUTES_PER_DAY, from_epoch_minute
+
+METHODS = ("linear", "previous", "nearest", "mean")
+DEFAULT_STEP = 15
+DEFAULT_MAX_GAP = 60
+
+
+class ResampledGrid:
+    """日×時間枠の密な行列（欠測はNaN）"""
+
+    def __init__(self, days, step, values):
+        # days: 各行のエポック日番号, values: (日数, 1日の枠数) の配列
+        self.days = days
+        self.step = step
+        self.values = values
+
+    @property
+    def slots_per_day(self):
+        return MINUTES_PER_DAY // self.step
+
+    def dates(self):
+        return [from_epoch_minute(int(day) * MINUTES_PER_DAY).date() for day in self.days]
+
+    def weekdays(self):
+        """各行の曜日（0=月曜、1970-01-01は木曜日）"""
+        return (self.days + 3) % WEEKDAYS
+
+    def slot_times(self):
+        """各列の開始時刻 "HH:MM" """
+        return [f"{minute // 60:02d}:{minute % 60:02d}" for minute in range(0, MINUTES_PER_DAY, self.step)]
+
+    def coverage(self):
+        """値のある枠の割合"""
+        return float(np.isfinite(self.values).mean()) if self.values.size else 0.0
+
+    def weekday_profile(self):
+        """曜日×時間枠の平均と日数 (mean, count)（いずれも 7×枠数、日数0の枠はNaN）"""
+        slots = self.slots_per_day
+        present = np.isfinite(self.values)
+        buckets = (self.weekdays()[:, None] * slots + np.arange(slots)[None, :])[present]
+        counts = np.bincount(buckets, minlength=WEEKDAYS * slots)
+        sums = np.bincount(buckets, weights=self.values[present], minlength=WEEKDAYS * slots)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = sums / counts
+        return means.reshape(WEEKDAYS, slots), counts.reshape(WEEKDAYS, slots)
+
+
+def _unique_readings(minutes, counts):
+    """同じ分の記録を平均して時刻順に並べる"""
+    times, inverse = np.unique(minutes, return_inverse=True)
+    sums = np.bincount(inverse, weights=counts)
+    return times, sums / np.bincount(inverse)
+
+
+def resample(minutes, counts, step=DEFAULT_STEP, method="linear", max_gap=DEFAULT_MAX_GAP,
+             start_day=None, end_day=None):
+    """エポック分・人数の配列を日×時間枠の ResampledGrid に変換
+
+    各枠の値は枠の開始時刻における値（mean のみ枠内の記録の平均）。
+    start_day / end_day（エポック日番号、両端を含む）を省略すると記録のある範囲全体。
+    """
+    if method not in METHODS:
+        raise ValueError(f"不明な補間方法: {method}（{', '.join(METHODS)}）")
+    if step <= 0 or MINUTES_PER_DAY % step:
+        raise ValueError(f"時間枠は1日（{MINUTES_PER_DAY}分）を割り切る分数で指定してください: {step}")
+
+    minutes = np.asarray(minutes, dtype=np.int64)
+    counts = np.asarray(counts, dtype=np.float64)
+    slots = MINUTES_PER_DAY // step
+    if not len(minutes) and (start_day is None or end_day is None):
+        return ResampledGrid(np.zeros(0, dtype=np.int64), step, np.zeros((0, slots)))
+    if start_day is None:
+        start_day = int(minutes.min()) // MINUTES_PER_DAY
+    if end_day is None:
+        end_day = int(minutes.max()) // MINUTES_PER_DAY
+    days = np.arange(start_day, end_day + 1, dtype=np.int64)
+    origin = start_day * MINUTES_PER_DAY
+    n_cells = len(days) * slots
+
+    if method == "mean":
+        offsets = minutes - origin
+        inside = (offsets >= 0) & (offsets < n_cells * step)
+        cells = offsets[inside] // step
+        totals = np.bincount(cells, minlength=n_cells)
+        sums = np.bincount(cells, weights=counts[inside], minlength=n_cells)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            values = sums / totals
+        return ResampledGrid(days, step, values.reshape(len(days), slots))
+
+    values = np.full(n_cells, np.nan)
+    times, readings = _unique_readings(minutes, counts)
+    if not len(times):
+        return ResampledGrid(days, step, values.reshape(len(days), slots))
+
+    grid = origin + np.arange(n_cells, dtype=np.int64) * step
+    # 各グリッド点の直前（以下）と直後（超）の記録
+    right = np.searchsorted(times, grid, side="right")
+    left = right - 1
+    has_left = left >= 0
+    has_right = right < len(times)
+    left = np.clip(left, 0, len(times) - 1)
+    right = np.clip(right, 0, len(times) - 1)
+    left_gap = np.where(has_left, grid - times[left], np.iinfo(np.int64).max)
+    right_gap = np.where(has_right, times[right] - grid, np.iinfo(np.int64).max)
+
+    if method == "previous":
+        valid = left_gap <= max_gap
+        values[valid] = readings[left[valid]]
+    elif method == "nearest":
+        use_right = right_gap < left_gap
+        nearest = np.where(use_right, right, left)
+        valid = np.minimum(left_gap, right_gap) <= max_gap
+        values[valid] = readings[nearest[valid]]
+    else:
+        # 記録ちょうどの点はそのまま、前後の記録の間隔が max_gap 以内なら線形補間
+        exact = left_gap == 0
+        span = times[right] - times[left]
+        between = has_left & has_right & ~exact & (span <= max_gap)
+        values[exact] = readings[left[exact]]
+        fraction = (grid[between] - times[left[between]]) / span[between]
+        values[between] = readings[left[between]] + (readings[right[between]] - readings[left[between]]) * fraction
+
+    return ResampledGrid(days, step, values.reshape(len(days), slots))
+
+
+def dataset_resample(dataset, step=DEFAULT_STEP, method="linear", max_gap=DEFAULT_MAX_GAP, **kwargs):
+    """CrowdDataset を日×時間枠の ResampledGrid に変換"""
+    arrays = dataset_arrays(dataset)
+    return resample(arrays["minute"], arrays["count"], step=step, method=method, max_gap=max_gap, **kwargs)
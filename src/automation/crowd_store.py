@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+混雑データ ストレージバックエンド
+- SQLiteCrowdStore: 重複キー(日時+場所+人数)のUNIQUE制約で重複除去をDB側に委譲
+- INSERT OR IGNORE によりコミットコストはバッチ件数のみに比例
+- PartitionedCSVStore: 月別CSV (data/YYYY/MM.csv) + パーティションマニフェスト
+  書き込みは行を受け取った月のみ、期間指定の読み込みは重なる月のみを開く
+"""
+
+import csv
+import json
+import logging
+import re
+import shutil
+import sqlite3
+from collections import defaultdict
+from pathlib import Path
+
+LOCATION = "矢向"
+
+FIELDNAMES = [
+    "datetime", "date", "time", "hour", "weekday",
+    "count", "status_label", "status_code", "status_min", "status_max", "raw_text"
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS readings (
+    id INTEGER PRIMARY KEY,
+    datetime TEXT NOT NULL,
+    location TEXT NOT NULL,
+    date TEXT NOT NULL,
+    time TEXT NOT NULL,
+    hour INTEGER NOT NULL,
+    weekday TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    status_label TEXT,
+    status_code INTEGER,
+    status_min INTEGER,
+    status_max INTEGER,
+    raw_text TEXT,
+    -- 日時が先頭列のため、この索引が日時の範囲検索も兼ねる
+    UNIQUE (datetime, location, count)
+);
+CREATE INDEX IF NOT EXISTS idx_readings_weekday_hour ON readings (weekday, hour);
+"""
+
+
+def _as_int(value):
+    """CSV由来の文字列も含めて整数に変換（空はNone）"""
+    if value in (None, ""):
+        return None
+    return int(value)
+
+
+class SQLiteCrowdStore:
+    """SQLiteによる混雑データストア"""
+
+    def __init__(self, db_path, logger=None):
+        self.db_path = Path(db_path)
+        self.logger = logger or logging.getLogger(__name__)
+        self._connection = None
+
+    @property
+    def connection(self):
+        """接続を初回利用時に開き、スキーマを作成"""
+        if self._connection is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self._connection.row_factory = sqlite3.Row
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.executescript(SCHEMA)
+        return self._connection
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def insert_rows(self, rows):
+        """INSERT OR IGNORE で挿入し、新規に挿入された行のみを返す"""
+        inserted = []
+        with self.connection:
+            for row in rows:
+                cursor = self.connection.execute(
+                    """
+                    INSERT OR IGNORE INTO readings (
+                        datetime, location, date, time, hour, weekday, count,
+                        status_label, status_code, status_min, status_max, raw_text
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        row["datetime"], LOCATION, row["date"], row["time"],
+                        _as_int(row["hour"]), row["weekday"], _as_int(row["count"]),
+                        row.get("status_label", ""), _as_int(row.get("status_code")),
+                        _as_int(row.get("status_min")), _as_int(row.get("status_max")),
+                        row.get("raw_text", ""),
+                    ),
+                )
+                if cursor.rowcount == 1:
+                    inserted.append(row)
+        return inserted
+
+    def count(self):
+        """総レコード数"""
+        return self.connection.execute("SELECT COUNT(*) FROM readings").fetchone()[0]
+
+    def latest_datetime(self):
+        """最新のレコード日時（データなしは空文字）"""
+        value = self.connection.execute("SELECT MAX(datetime) FROM readings").fetchone()[0]
+        return value or ""
+
+    def iter_rows(self, since=None, until=None):
+        """日時順にレコードを返すジェネレータ（CSVと同じ列構成）"""
+        conditions = []
+        params = []
+        if since:
+            conditions.append("datetime >= ?")
+            params.append(since)
+        if until:
+            conditions.append("datetime <= ?")
+            params.append(until)
+        query = f"SELECT {', '.join(FIELDNAMES)} FROM readings"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY datetime, count"
+        for record in self.connection.execute(query, params):
+            yield dict(record)
+
+
+class PartitionedCSVStore:
+    """月別パーティションCSVによる混雑データストア"""
+
+    PARTITION_PATTERN = re.compile(r"^(\d{4})-(\d{2})")
+
+    def __init__(self, base_dir, logger=None):
+        self.base_dir = Path(base_dir)
+        self.manifest_file = self.base_dir / "partitions.json"
+        self.logger = logger or logging.getLogger(__name__)
+        self._manifest = None
+
+    @staticmethod
+    def dedupe_key(row):
+        """重複チェック用キー（日時+場所+人数）"""
+        return (row.get("datetime", ""), LOCATION, str(row.get("count", "")))
+
+    @classmethod
+    def partition_key(cls, datetime_str):
+        """日時文字列からパーティションキー "YYYY/MM" を返す（不正値はNone）"""
+        match = cls.PARTITION_PATTERN.match(datetime_str or "")
+        return f"{match.group(1)}/{match.group(2)}" if match else None
+
+    def partition_path(self, key):
+        return self.base_dir / f"{key}.csv"
+
+    def _load_manifest(self):
+        """マニフェストを読み込み（初回のみ、なければパーティションを走査して再構築）"""
+        if self._manifest is None:
+            self._manifest = {}
+            if self.manifest_file.exists():
+                try:
+                    with self.manifest_file.open(encoding="utf-8") as f:
+                        self._manifest = json.load(f)
+                    return self._manifest
+                except Exception as e:
+                    self.logger.warning(f"パーティションマニフェスト読み込みエラー、再構築します: {e}")
+            for path in sorted(self.base_dir.glob("[0-9][0-9][0-9][0-9]/[0-9][0-9].csv")):
+                key = f"{path.parent.name}/{path.stem}"
+                self._manifest[key] = self._partition_summary(list(self._read_partition(key)))
+            if self._manifest:
+                self._save_manifest()
+        return self._manifest
+
+    def _save_manifest(self):
+        """マニフェストをアトミックに保存"""
+        self.manifest_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.manifest_file.with_suffix(".tmp")
+        with tmp_file.open("w", encoding="utf-8") as f:
+            json.dump(self._manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+        shutil.move(str(tmp_file), str(self.manifest_file))
+
+    @staticmethod
+    def _partition_summary(rows):
+        datetimes = [row.get("datetime", "") for row in rows]
+        return {
+            "rows": len(rows),
+            "first": min(datetimes, default=""),
+            "last": max(datetimes, default=""),
+        }
+
+    def _read_partition(self, key):
+        path = self.partition_path(key)
+        if not path.exists():
+            return
+        with path.open(newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+
+    def _write_partition(self, key, rows):
+        """1パーティションを一時ファイル経由でアトミックに書き換え"""
+        path = self.partition_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = path.with_suffix(".tmp")
+        try:
+            with tmp_file.open("w", encoding="utf-8", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+                writer.writeheader()
+                for row in rows:
+                    writer.writerow({field: row.get(field, "") for field in FIELDNAMES})
+            shutil.move(str(tmp_file), str(path))
+        finally:
+            if tmp_file.exists():
+                tmp_file.unlink()
+
+    def insert_rows(self, rows):
+        """行を月別に振り分け、既存と重複しない行のみを該当パーティションに書き込む"""
+        manifest = self._load_manifest()
+        by_partition = defaultdict(list)
+        for row in rows:
+            key = self.partition_key(row.get("datetime"))
+            if key is None:
+                self.logger.warning(f"日時が不正な行をスキップ: {row.get('datetime')!r}")
+                continue
+            by_partition[key].append(row)
+
+        inserted = []
+        for key in sorted(by_partition):
+            existing = list(self._read_partition(key))
+            seen = {self.dedupe_key(row) for row in existing}
+            added = []
+            for row in by_partition[key]:
+                dedupe_key = self.dedupe_key(row)
+                if dedupe_key not in seen:
+                    seen.add(dedupe_key)
+                    added.append(row)
+            if not added:
+                continue
+            merged = sorted(existing + added, key=lambda row: row.get("datetime", ""))
+            self._write_partition(key, merged)
+            manifest[key] = self._partition_summary(merged)
+            inserted.extend(added)
+
+        if inserted:
+            self._save_manifest()
+        return inserted
+
+    def partitions(self, since=None, until=None):
+        """期間と重なるパーティションキーを昇順で返す"""
+        since_key = self.partition_key(since) if since else None
+        until_key = self.partition_key(until) if until else None
+        return [
+            key for key in sorted(self._load_manifest())
+            if (since_key is None or key >= since_key) and (until_key is None or key <= until_key)
+        ]
+
+    def count(self):
+        """総レコード数"""
+        return sum(entry["rows"] for entry in self._load_manifest().values())
+
+    def latest_datetime(self):
+        """最新のレコード日時（データなしは空文字）"""
+        return max((entry["last"] for entry in self._load_manifest().values()), default="")
+
+    def iter_rows(self, since=None, until=None):
+        """日時順にレコードを返すジェネレータ（重なるパーティションのみを開く）"""
+        for key in self.partitions(since, until):
+            for row in self._read_partition(key):
+                value = row.get("datetime", "")
+                if since and value < since:
+                    continue
+                if until and value > until:
+                    continue
+                yield row
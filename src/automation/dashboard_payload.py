@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+ダッシュボード用の集計済みペイロード
+- 曜日×時間帯の件数・平均・最小・最大・標準偏差・分位点(p50/p90/p99)、ステータス別件数、データ期間のみを含むJSON
+- 生データCSVの代わりに数KBで曜日別グラフを描画できる
+- 事前圧縮版(.json.gz)も同時に出力（gzip_static 等の静的配信向け）
+- version はペイロード形式、data_version は内容のハッシュ（変更検知・ETag用）
+"""
+
+import datetime as dt
+import gzip
+import hashlib
+import json
+import logging
+import math
+import shutil
+from pathlib import Path
+
+from quantile_sketch import QUANTILES, quantile_name
+
+PAYLOAD_VERSION = 1
+PAYLOAD_FILENAME = "crowd_aggregates.json"
+
+# RunningAggregates の曜日番号(0=月曜)順の英語名
+WEEKDAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def _round_or_none(value, digits=2):
+    """NaN（データなし）はNone、それ以外は丸めた値"""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return round(value, digits)
+
+
+def build_payload(aggregates):
+    """RunningAggregates からペイロード（dict）を組み立てる"""
+    grid = aggregates.grid()
+    weekdays = {}
+    for index, name in enumerate(WEEKDAY_NAMES):
+        weekdays[name] = {
+            "count": grid["count"][index],
+            "mean": [_round_or_none(value) for value in grid["mean"][index]],
+            "min": [_round_or_none(value, 0) for value in grid["min"][index]],
+            "max": [_round_or_none(value, 0) for value in grid["max"][index]],
+            "std": [_round_or_none(value) for value in grid["std"][index]],
+        }
+        for stat in map(quantile_name, QUANTILES):
+            weekdays[name][stat] = [_round_or_none(value, 1) for value in grid[stat][index]]
+    first, last = aggregates.date_range()
+    content = {
+        "total_records": aggregates.total(),
+        "date_range": {
+            "start": first.split(" ")[0] if first else None,
+            "end": last.split(" ")[0] if last else None,
+            "latest": last,
+        },
+        "status_counts": aggregates.status_counts(),
+        "weekdays": weekdays,
+    }
+    data_version = hashlib.sha256(
+        json.dumps(content, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    ).hexdigest()[:16]
+    return {
+        "version": PAYLOAD_VERSION,
+        "data_version": data_version,
+        "generated_at": dt.datetime.now().isoformat(timespec="seconds"),
+        **content,
+    }
+
+
+def _atomic_write(path, data):
+    tmp_file = path.with_name(path.name + ".tmp")
+    try:
+        with tmp_file.open("wb") as f:
+            f.write(data)
+        shutil.move(str(tmp_file), str(path))
+    finally:
+        if tmp_file.exists():
+            tmp_file.unlink()
+
+
+def write_payload(payload, directories, logger=None):
+    """ペイロードを各ディレクトリに .json と .json.gz で書き出す（内容が同じなら書き換えない）"""
+    logger = logger or logging.getLogger(__name__)
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    # mtime=0 で圧縮結果を内容のみから決定
+    compressed = gzip.compress(body, compresslevel=9, mtime=0)
+    written = []
+    for directory in directories:
+        path = Path(directory) / PAYLOAD_FILENAME
+        try:
+            if path.exists():
+                with path.open(encoding="utf-8") as f:
+                    if json.load(f).get("data_version") == payload["data_version"]:
+                        continue
+            path.parent.mkdir(parents=True, exist_ok=True)
+            _atomic_write(path, body)
+            _atomic_write(path.with_name(path.name + ".gz"), compressed)
+            written.append(path)
+        except Exception as e:
+            logger.warning(f"ダッシュボード集計の書き出しエラー {path}: {e}")
+    if written:
+        logger.info(
+            f"📦 ダッシュボード集計を更新: {len(body) / 1024:.1f}KB (gzip {len(compressed) / 1024:.1f}KB) "
+            f"v{payload['data_version']}"
+        )
+    return written
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+ディレクトリ監視（watchモード用）
+- Linux: inotify（ctypes経由、追加依存なし）
+- その他: ディレクトリ更新日時の軽量ポーリング
+"""
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import sys
+import time
+
+
+class InotifyWatcher:
+    """inotifyでファイルの書き込み完了・移動を検知"""
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+
+    def __init__(self, directory):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        watch = libc.inotify_add_watch(
+            self.fd, os.fsencode(str(directory)), self.IN_CLOSE_WRITE | self.IN_MOVED_TO
+        )
+        if watch < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, os.strerror(errno), str(directory))
+
+    def wait(self, timeout):
+        """変更があればTrue、timeout秒経過でFalse"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return False
+        # 溜まったイベントを読み捨て（再走査はマニフェスト側で差分判定）
+        while True:
+            try:
+                if not os.read(self.fd, 65536):
+                    break
+            except BlockingIOError:
+                break
+        return True
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """ディレクトリ自体の更新日時を定期確認（ファイル追加・移動で変化）"""
+
+    def __init__(self, directory, interval=2.0):
+        self.directory = directory
+        self.interval = interval
+        self._last_mtime = self._mtime()
+
+    def _mtime(self):
+        try:
+            return os.stat(self.directory).st_mtime_ns
+        except OSError:
+            return None
+
+    def wait(self, timeout):
+        """変更があればTrue、timeout秒経過でFalse"""
+        deadline = time.monotonic() + timeout
+        while True:
+            current = self._mtime()
+            if current != self._last_mtime:
+                self._last_mtime = current
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(self.interval, remaining))
+
+    def close(self):
+        pass
+
+
+def create_watcher(directory, poll_interval=2.0, logger=None):
+    """プラットフォームに応じた監視方式を選択"""
+    logger = logger or logging.getLogger(__name__)
+    if sys.platform.startswith("linux"):
+        try:
+            watcher = InotifyWatcher(directory)
+            logger.info(f"👀 inotifyで監視開始: {directory}")
+            return watcher
+        except (OSError, AttributeError) as e:
+            logger.warning(f"inotify初期化失敗、ポーリングに切り替え: {e}")
+    logger.info(f"👀 ポーリング({poll_interval}秒間隔)で監視開始: {directory}")
+    return PollingWatcher(directory, poll_interval)
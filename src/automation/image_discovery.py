@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+増分画像検出（マニフェスト方式）
+- os.scandir で1回だけ走査し、stat も1ファイル1回のみ
+- 処理済み画像の (path, size, mtime, sha256) をマニフェストに永続化
+- 未処理・変更ありの画像のみを返し、同一inodeの重複エントリは除外
+"""
+
+import json
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+
+from ocr_cache import OCRResultCache
+
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg"}
+
+
+class ImageManifest:
+    """処理済み画像のマニフェスト（JSON永続化）"""
+
+    def __init__(self, path, retention_days=180, logger=None):
+        self.path = Path(path)
+        self.retention_days = retention_days
+        self.logger = logger or logging.getLogger(__name__)
+        self._entries = None
+        self._dirty = False
+
+    def _load(self):
+        """マニフェストを読み込み（初回のみ）"""
+        if self._entries is None:
+            self._entries = {}
+            if self.path.exists():
+                try:
+                    with self.path.open(encoding="utf-8") as f:
+                        self._entries = json.load(f)
+                except Exception as e:
+                    self.logger.warning(f"画像マニフェスト読み込みエラー: {e}")
+        return self._entries
+
+    def discover(self, directory):
+        """ディレクトリを1回走査し、未処理・変更ありの画像を更新日時順で返す"""
+        entries = self._load()
+        seen_inodes = set()
+        found = []
+
+        with os.scandir(directory) as it:
+            for dir_entry in it:
+                if os.path.splitext(dir_entry.name)[1].lower() not in IMAGE_SUFFIXES:
+                    continue
+                if not dir_entry.is_file():
+                    continue
+                stat = dir_entry.stat()
+
+                # 大文字小文字を区別しないFSやハードリンクによる同一ファイルを除外
+                inode = (stat.st_dev, stat.st_ino)
+                if inode in seen_inodes:
+                    continue
+                seen_inodes.add(inode)
+
+                known = entries.get(dir_entry.path)
+                if known and known["size"] == stat.st_size and known["mtime_ns"] == stat.st_mtime_ns:
+                    continue
+                if known and known["size"] == stat.st_size:
+                    # 更新日時のみ変化（iCloud再同期など）: 内容が同じならスキップ
+                    if OCRResultCache.image_digest(dir_entry.path) == known["sha256"]:
+                        known["mtime_ns"] = stat.st_mtime_ns
+                        self._dirty = True
+                        continue
+
+                found.append((stat.st_mtime_ns, Path(dir_entry.path), stat))
+
+        found.sort(key=lambda item: item[0])
+        return [(path, stat) for _, path, stat in found]
+
+    def mark(self, image_path, stat, sha256=None):
+        """画像を処理済みとして記録（保存はsave()でまとめて実行）"""
+        self._load()[str(image_path)] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": sha256 or OCRResultCache.image_digest(image_path),
+            "seen_at": int(time.time()),
+        }
+        self._dirty = True
+
+    def save(self):
+        """保持期間を過ぎたエントリを削除し、変更があればアトミックに保存"""
+        entries = self._load()
+        cutoff = time.time() - self.retention_days * 86400
+        expired = [path for path, entry in entries.items() if entry.get("seen_at", 0) < cutoff]
+        for path in expired:
+            del entries[path]
+        if not (self._dirty or expired):
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.path.with_suffix(".tmp")
+        try:
+            with tmp_file.open("w", encoding="utf-8") as f:
+                json.dump(entries, f, ensure_ascii=False)
+            shutil.move(str(tmp_file), str(self.path))
+            self._dirty = False
+        except Exception as e:
+            if tmp_file.exists():
+                tmp_file.unlink()
+            self.logger.warning(f"画像マニフェスト保存エラー: {e}")
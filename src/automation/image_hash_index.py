@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+知覚ハッシュによる重複スクリーンショット検出
+- 差分ハッシュ(dHash)を解像度・切り出し領域ごとに索引化
+- 同一時刻の撮影でハミング距離が閾値以下なら同一画像とみなし、OCRを省略して既存レコードを再利用
+"""
+
+import importlib
+import json
+import logging
+import shutil
+import threading
+from collections import defaultdict
+from pathlib import Path
+
+
+def difference_hash(image_path, region=None, hash_size=16):
+    """差分ハッシュ(dHash)を整数で返す（hash_size^2 ビット）"""
+    image_module = importlib.import_module("PIL.Image")
+    with image_module.open(image_path) as image:
+        if region:
+            image = image.crop(region)
+        pixels = list(
+            image.convert("L").resize((hash_size + 1, hash_size), image_module.BILINEAR).getdata()
+        )
+
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+class PerceptualHashIndex:
+    """取り込み済み画像の知覚ハッシュ索引（JSON永続化）"""
+
+    def __init__(self, path, max_distance=4, max_entries=20000, logger=None):
+        self.path = Path(path)
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self.logger = logger or logging.getLogger(__name__)
+        self._entries = None
+        self._lock = threading.RLock()
+        self._by_datetime = defaultdict(list)
+        self._dirty = False
+
+    def _load(self):
+        """索引ファイルを読み込み（初回のみ）"""
+        if self._entries is None:
+            self._entries = []
+            if self.path.exists():
+                try:
+                    with self.path.open(encoding="utf-8") as f:
+                        self._entries = json.load(f)
+                except Exception as e:
+                    self.logger.warning(f"知覚ハッシュ索引読み込みエラー: {e}")
+            for entry in self._entries:
+                self._by_datetime[entry["record"].get("datetime")].append(entry)
+        return self._entries
+
+    def find(self, layout_key, phash, datetime_str):
+        """同一レイアウト・同一時刻で近似ハッシュを持つエントリを返す（なければNone）"""
+        with self._lock:
+            self._load()
+            for entry in self._by_datetime.get(datetime_str, ()):
+                if entry["layout"] != layout_key:
+                    continue
+                if bin(int(entry["hash"], 16) ^ phash).count("1") <= self.max_distance:
+                    return entry
+            return None
+
+    def add(self, layout_key, phash, record, image_name):
+        """OCR済みレコードを索引に追加（保存はsave()でまとめて実行）"""
+        with self._lock:
+            entries = self._load()
+            entry = {
+                "layout": layout_key,
+                "hash": f"{phash:x}",
+                "image": image_name,
+                "record": record,
+            }
+            entries.append(entry)
+            self._by_datetime[record.get("datetime")].append(entry)
+            if len(entries) > self.max_entries:
+                for old_entry in entries[:len(entries) - self.max_entries]:
+                    self._by_datetime[old_entry["record"].get("datetime")].remove(old_entry)
+                del entries[:len(entries) - self.max_entries]
+            self._dirty = True
+
+    def save(self):
+        """変更があれば索引ファイルをアトミックに保存"""
+        with self._lock:
+            if not self._dirty:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.path.with_suffix(".tmp")
+            try:
+                with tmp_file.open("w", encoding="utf-8") as f:
+                    json.dump(self._entries, f, ensure_ascii=False)
+                shutil.move(str(tmp_file), str(self.path))
+                self._dirty = False
+            except Exception as e:
+                if tmp_file.exists():
+                    tmp_file.unlink()
+                self.logger.warning(f"知覚ハッシュ索引保存エラー: {e}")
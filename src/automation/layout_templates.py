@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+スクリーンショット解像度別レイアウトテンプレート
+- 解像度(幅x高さ)ごとに混雑ウィジェット領域を保持
+- OCR成功時のバウンディングボックスから領域を自動学習
+- 学習済み解像度ではウィジェット領域のみを切り出してOCR
+- persist=False（ワーカープロセス用）では保存せず、学習結果を親プロセスに渡して merge() で一括保存
+"""
+
+import importlib
+import json
+import logging
+import shutil
+import threading
+from pathlib import Path
+
+from optional_deps import is_module_available
+
+# 領域切り出しには Pillow と numpy が必要
+REGION_CROP_AVAILABLE = is_module_available("PIL") and is_module_available("numpy")
+
+
+def box_bounds(box):
+    """EasyOCRの4点ボックスを (x0, y0, x1, y1) に変換"""
+    xs = [int(point[0]) for point in box]
+    ys = [int(point[1]) for point in box]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def offset_box(box, dx, dy):
+    """切り出し座標系のボックスを元画像座標系に戻す"""
+    return [[int(point[0]) + dx, int(point[1]) + dy] for point in box]
+
+
+def image_size(image_path):
+    """画像サイズを取得（ヘッダーのみ読み込み）"""
+    image_module = importlib.import_module("PIL.Image")
+    with image_module.open(image_path) as image:
+        return image.size
+
+
+def load_region(image_path, region=None):
+    """画像を読み込み、指定領域を切り出したRGB配列を返す"""
+    image_module = importlib.import_module("PIL.Image")
+    numpy = importlib.import_module("numpy")
+    with image_module.open(image_path) as image:
+        image = image.convert("RGB")
+        if region:
+            image = image.crop(region)
+        return numpy.asarray(image)
+
+
+class LayoutTemplateStore:
+    """解像度ごとのウィジェット領域テンプレート（JSON永続化）"""
+
+    def __init__(self, path, margin=0.15, logger=None, persist=True):
+        self.path = Path(path)
+        self.margin = margin
+        self.logger = logger or logging.getLogger(__name__)
+        self.persist = persist
+        self._templates = None
+        self._learned = {}
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _key(width, height):
+        return f"{width}x{height}"
+
+    def _load(self):
+        """テンプレートファイルを読み込み（初回のみ）"""
+        if self._templates is None:
+            self._templates = {}
+            if self.path.exists():
+                try:
+                    with self.path.open(encoding="utf-8") as f:
+                        self._templates = json.load(f)
+                except Exception as e:
+                    self.logger.warning(f"レイアウトテンプレート読み込みエラー: {e}")
+        return self._templates
+
+    def _save(self):
+        """テンプレートファイルをアトミックに保存"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.path.with_suffix(".tmp")
+        try:
+            with tmp_file.open("w", encoding="utf-8") as f:
+                json.dump(self._templates, f, ensure_ascii=False, indent=2)
+            shutil.move(str(tmp_file), str(self.path))
+        except Exception as e:
+            if tmp_file.exists():
+                tmp_file.unlink()
+            self.logger.warning(f"レイアウトテンプレート保存エラー: {e}")
+
+    def get(self, width, height):
+        """解像度に対応する切り出し領域 (x0, y0, x1, y1) を返す（未学習ならNone）"""
+        with self._lock:
+            template = self._load().get(self._key(width, height))
+            return tuple(template["region"]) if template else None
+
+    def learn(self, width, height, boxes):
+        """ウィジェット要素のボックス群から切り出し領域を学習"""
+        with self._lock:
+            if not boxes:
+                return None
+            bounds = [box_bounds(box) for box in boxes]
+            x0 = min(b[0] for b in bounds)
+            y0 = min(b[1] for b in bounds)
+            x1 = max(b[2] for b in bounds)
+            y1 = max(b[3] for b in bounds)
+
+            # 表示位置の揺れを吸収するため余白を追加
+            pad_x = int((x1 - x0) * self.margin) + 8
+            pad_y = int((y1 - y0) * self.margin) + 8
+            region = [
+                max(0, x0 - pad_x),
+                max(0, y0 - pad_y),
+                min(width, x1 + pad_x),
+                min(height, y1 + pad_y),
+            ]
+
+            templates = self._load()
+            key = self._key(width, height)
+            previous = templates.get(key)
+            if previous and previous["region"] == region:
+                return tuple(region)
+
+            templates[key] = {"region": region}
+            if self.persist:
+                self._save()
+            else:
+                self._learned[key] = {"region": region}
+            ratio = (region[2] - region[0]) * (region[3] - region[1]) / float(width * height)
+            self.logger.info(f"📐 レイアウトテンプレート学習: {key} -> {region} (画素比 {ratio:.1%})")
+            return tuple(region)
+
+    def take_learned(self):
+        """persist=False で学習した未保存のテンプレートを取り出す"""
+        with self._lock:
+            learned, self._learned = self._learned, {}
+            return learned
+
+    def merge(self, learned):
+        """ワーカーが学習したテンプレートを反映し、変更があれば1回だけ保存"""
+        if not learned:
+            return 0
+        with self._lock:
+            templates = self._load()
+            changed = [key for key, template in learned.items() if templates.get(key) != template]
+            for key in changed:
+                templates[key] = learned[key]
+            if changed and self.persist:
+                self._save()
+            return len(changed)
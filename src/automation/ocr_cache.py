@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+コンテンツアドレス型OCR結果キャッシュ
+- キー: 画像バイト列のSHA-256 + エンジン名 + エンジンバージョン（領域OCRは切り出し領域も含む）
+- 値: OCRの生テキスト断片・信頼度・バウンディングボックス
+- 合計サイズが上限を超えたら最終アクセスの古い順に削除
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+from pathlib import Path
+
+
+class OCRResultCache:
+    """画像内容をキーにしたOCR結果のディスクキャッシュ"""
+
+    def __init__(self, cache_dir, max_bytes=64 * 1024 * 1024, logger=None):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.logger = logger or logging.getLogger(__name__)
+        self._total_bytes = None
+
+    @staticmethod
+    def image_digest(image_path):
+        """画像ファイルのSHA-256を計算"""
+        digest = hashlib.sha256()
+        with open(image_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _entry_path(self, digest, engine, version, region=None):
+        safe_version = re.sub(r"[^0-9A-Za-z.+-]", "_", str(version))
+        # 切り出し領域が変わればOCR結果も変わるため、領域OCRは領域ごとに別エントリ
+        region_part = "_" + "-".join(str(int(value)) for value in region) if region else ""
+        return self.cache_dir / digest[:2] / f"{digest}_{engine}{region_part}_{safe_version}.json"
+
+    def get(self, digest, engine, version, region=None):
+        """キャッシュ済みのテキスト断片 [(box, text, conf), ...] を返す（なければNone）"""
+        entry_path = self._entry_path(digest, engine, version, region)
+        try:
+            with entry_path.open(encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            self.logger.warning(f"OCRキャッシュ読み込みエラー: {e}")
+            return None
+
+        # LRU判定用に最終アクセス時刻を更新
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+        return [(fragment["box"], fragment["text"], fragment["conf"]) for fragment in entry["fragments"]]
+
+    def put(self, digest, engine, version, fragments, region=None):
+        """テキスト断片をキャッシュに保存"""
+        entry_path = self._entry_path(digest, engine, version, region)
+        entry = {
+            "sha256": digest,
+            "engine": engine,
+            "version": str(version),
+            "region": list(region) if region else None,
+            "fragments": [
+                {"box": box, "text": text, "conf": conf} for box, text, conf in fragments
+            ],
+        }
+
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = entry_path.with_suffix(".tmp")
+        try:
+            with tmp_file.open("w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            shutil.move(str(tmp_file), str(entry_path))
+        except Exception as e:
+            if tmp_file.exists():
+                tmp_file.unlink()
+            self.logger.warning(f"OCRキャッシュ保存エラー: {e}")
+            return False
+
+        if self._total_bytes is not None:
+            self._total_bytes += entry_path.stat().st_size
+        self._evict_if_needed()
+        return True
+
+    def _entries(self):
+        """キャッシュエントリ一覧 [(mtime, size, path), ...]"""
+        entries = []
+        if not self.cache_dir.exists():
+            return entries
+        for shard in os.scandir(self.cache_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".json"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, Path(entry.path)))
+        return entries
+
+    def _evict_if_needed(self):
+        """合計サイズが上限を超えた場合、古いエントリから削除"""
+        if self._total_bytes is None:
+            self._total_bytes = sum(size for _, size, _ in self._entries())
+        if self._total_bytes <= self.max_bytes:
+            return
+
+        entries = sorted(self._entries())
+        self._total_bytes = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if self._total_bytes <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                self._total_bytes -= size
+                removed += 1
+            except OSError:
+                continue
+        if removed:
+            self.logger.info(f"🧹 OCRキャッシュ削除: {removed}件 (上限 {self.max_bytes // (1024 * 1024)}MB)")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+OCRエンジンラッパー（遅延ロード版）
+- easyocr / torch / pytesseract はモジュール読み込み時にはimportしない
+- 初回利用時にのみimport・初期化（analyze / diagnose の起動を軽量化）
+"""
+
+import importlib
+import logging
+
+from optional_deps import is_module_available, package_version
+
+EASYOCR_AVAILABLE = is_module_available("easyocr")
+TESSERACT_AVAILABLE = is_module_available("pytesseract") and is_module_available("PIL")
+
+if not EASYOCR_AVAILABLE:
+    logging.warning("EasyOCR not available. Install with: pip install easyocr")
+if not TESSERACT_AVAILABLE:
+    logging.warning("Tesseract not available. Install with: pip install pytesseract pillow")
+
+
+class EasyOCREngine:
+    """EasyOCR Readerを初回利用時に生成するラッパー"""
+
+    name = "easyocr"
+
+    def __init__(self, languages=("ja", "en"), gpu=False, logger=None):
+        self.languages = list(languages)
+        self.gpu = gpu
+        self.logger = logger or logging.getLogger(__name__)
+        self._module = None
+        self._reader = None
+        self._init_failed = False
+
+    @property
+    def available(self):
+        """インストール済みかつ初期化に失敗していないか"""
+        return EASYOCR_AVAILABLE and not self._init_failed
+
+    @property
+    def loaded(self):
+        """Readerが既に初期化済みか"""
+        return self._reader is not None
+
+    @property
+    def version(self):
+        """エンジンのバージョン文字列（モデルをロードせずに取得）"""
+        return package_version("easyocr")
+
+    def _import(self):
+        """easyocrモジュールを遅延import"""
+        if self._module is None and EASYOCR_AVAILABLE:
+            self._module = importlib.import_module("easyocr")
+        return self._module
+
+    @property
+    def reader(self):
+        """easyocr.Readerを取得（初回のみ初期化、失敗時はNone）"""
+        if self._reader is None and self.available:
+            try:
+                self._reader = self._import().Reader(self.languages, gpu=self.gpu)
+                self.logger.info("EasyOCR初期化完了")
+            except Exception as e:
+                self._init_failed = True
+                self.logger.warning(f"EasyOCR初期化失敗: {e}")
+        return self._reader
+
+    def readtext(self, image, **kwargs):
+        """readtextを実行し [(box, text, confidence), ...] を返す"""
+        reader = self.reader
+        if reader is None:
+            return []
+        return reader.readtext(image, **kwargs)
+
+    def readtext_batched(self, images, batch_size=8, **kwargs):
+        """同一サイズの画像群をまとめて推論し、画像ごとの結果リストを返す"""
+        reader = self.reader
+        if reader is None:
+            return [[] for _ in images]
+        return reader.readtext_batched(images, batch_size=batch_size, **kwargs)
+
+
+class TesseractEngine:
+    """pytesseract / PIL を初回利用時にimportするラッパー"""
+
+    name = "tesseract"
+
+    def __init__(self, lang="jpn+eng", logger=None):
+        self.lang = lang
+        self.logger = logger or logging.getLogger(__name__)
+        self._pytesseract = None
+        self._image_module = None
+        self._version = None
+
+    @property
+    def available(self):
+        """インストール済みか"""
+        return TESSERACT_AVAILABLE
+
+    @property
+    def version(self):
+        """Tesseract本体のバージョン文字列"""
+        if self._version is None:
+            if not self.available:
+                self._version = "unavailable"
+            else:
+                try:
+                    self._version = str(self._import()[0].get_tesseract_version())
+                except Exception:
+                    self._version = "unknown"
+        return self._version
+
+    def _import(self):
+        """pytesseract と PIL.Image を遅延import"""
+        if self._pytesseract is None:
+            self._pytesseract = importlib.import_module("pytesseract")
+            self._image_module = importlib.import_module("PIL.Image")
+        return self._pytesseract, self._image_module
+
+    def image_to_string(self, image_path, lang=None, config="", region=None):
+        """画像ファイル（region指定時はその領域のみ）からテキストを抽出"""
+        pytesseract, image_module = self._import()
+        with image_module.open(image_path) as image:
+            if region:
+                image = image.crop(region)
+            return pytesseract.image_to_string(image, lang=lang or self.lang, config=config)
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+任意依存パッケージの有無・バージョン確認（importせずに判定）
+- OCRエンジン・列指向ミラーなど、任意依存を持つモジュールが共通で利用
+"""
+
+import importlib.metadata
+import importlib.util
+
+
+def is_module_available(module_name):
+    """モジュールをimportせずにインストール有無だけを確認"""
+    try:
+        return importlib.util.find_spec(module_name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def package_version(distribution_name):
+    """パッケージをimportせずにバージョンを取得"""
+    try:
+        return importlib.metadata.version(distribution_name)
+    except importlib.metadata.PackageNotFoundError:
+        return "unavailable"
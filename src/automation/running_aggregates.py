@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+曜日×時間帯バケットの累積集計（増分更新・JSON永続化）
+- バケットごとに件数・平均・偏差平方和(Welford)・最小・最大を保持
+- バケットごとの分位点スケッチで p50/p90/p99 を算出（生データの保持・ソートは不要）
+- コミットされた新しい行だけで更新し、分析・レポートは O(168) で算出
+- ステータスコード別件数とデータ期間（最古・最新日時）も併せて保持
+- 集計時点の保存先の行数を記録し、一致しなければ全件から再構築
+- merge() で別の集計（パーティション・期間ごとの集計など）を統合できる
+"""
+
+import json
+import logging
+import math
+import shutil
+import threading
+from pathlib import Path
+
+from columnar_mirror import convert_value
+from quantile_sketch import QUANTILES, HistogramSketch, quantile_name
+
+WEEKDAYS = 7
+HOURS = 24
+FORMAT_VERSION = 3
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _empty_bucket():
+    # [件数, 平均, 偏差平方和, 最小, 最大]
+    return [0, 0.0, 0.0, None, None]
+
+
+def merge_buckets(buckets):
+    """複数バケットを1つに統合（並列Welford）"""
+    n_total = 0
+    mean_total = 0.0
+    m2_total = 0.0
+    minimum = None
+    maximum = None
+    for n, mean, m2, bucket_min, bucket_max in buckets:
+        if not n:
+            continue
+        combined = n_total + n
+        delta = mean - mean_total
+        mean_total += delta * n / combined
+        m2_total += m2 + delta * delta * n_total * n / combined
+        n_total = combined
+        minimum = bucket_min if minimum is None else min(minimum, bucket_min)
+        maximum = bucket_max if maximum is None else max(maximum, bucket_max)
+    return [n_total, mean_total, m2_total, minimum, maximum]
+
+
+class RunningAggregates:
+    """曜日×時間帯の累積集計"""
+
+    def __init__(self, path, logger=None):
+        self.path = Path(path)
+        self.logger = logger or logging.getLogger(__name__)
+        self._lock = threading.RLock()
+        self._buckets = None
+        self._sketches = None
+        self._source_rows = -1
+        self._status_counts = {}
+        self._first = None
+        self._last = None
+        self._dirty = False
+
+    def _load(self):
+        """集計ファイルを読み込み（初回のみ）"""
+        if self._buckets is None:
+            self._buckets = [_empty_bucket() for _ in range(WEEKDAYS * HOURS)]
+            self._sketches = [HistogramSketch() for _ in range(WEEKDAYS * HOURS)]
+            if self.path.exists():
+                try:
+                    with self.path.open(encoding="utf-8") as f:
+                        state = json.load(f)
+                    if state.get("version") == FORMAT_VERSION:
+                        self._buckets = state["buckets"]
+                        self._sketches = [HistogramSketch.from_json(pairs) for pairs in state["sketches"]]
+                        self._source_rows = state["source_rows"]
+                        self._status_counts = state["status_counts"]
+                        self._first = state["first"]
+                        self._last = state["last"]
+                except Exception as e:
+                    self.logger.warning(f"累積集計の読み込みエラー: {e}")
+        return self._buckets
+
+    def matches(self, source_rows):
+        """集計が保存先の現在の行数と対応しているか"""
+        with self._lock:
+            self._load()
+            return self._source_rows == source_rows
+
+    def add(self, weekday, hour, count):
+        """1件をバケットに反映（Welfordの逐次更新）"""
+        index = weekday * HOURS + hour
+        bucket = self._load()[index]
+        self._sketches[index].add(count)
+        bucket[0] += 1
+        delta = count - bucket[1]
+        bucket[1] += delta / bucket[0]
+        bucket[2] += delta * (count - bucket[1])
+        bucket[3] = count if bucket[3] is None else min(bucket[3], count)
+        bucket[4] = count if bucket[4] is None else max(bucket[4], count)
+
+    def add_rows(self, rows):
+        """コミットされたCSV形式の行を反映（日時・人数が不正な行も保存先の行数には数える）"""
+        with self._lock:
+            self._load()
+            for row in rows:
+                timestamp = convert_value("datetime", row.get("datetime"))
+                count = convert_value("count", row.get("count"))
+                if timestamp is not None and count is not None:
+                    self.add(timestamp.weekday(), timestamp.hour, count)
+                    status_code = str(convert_value("status_code", row.get("status_code")) or 0)
+                    self._status_counts[status_code] = self._status_counts.get(status_code, 0) + 1
+                    value = timestamp.strftime(DATETIME_FORMAT)
+                    self._first = value if self._first is None else min(self._first, value)
+                    self._last = value if self._last is None else max(self._last, value)
+                self._source_rows += 1
+            self._dirty = True
+
+    def rebuild(self, dataset, source_rows):
+        """全件（CrowdDataset）から再構築"""
+        from crowd_analytics import dataset_arrays, dataset_grid
+        import numpy as np
+
+        grid = dataset_grid(dataset)
+        arrays = dataset_arrays(dataset)
+        status_counts = np.bincount(arrays["status_code"])
+        # バケット×人数のヒストグラムからスケッチを一括生成
+        keys = arrays["weekday"].astype(np.intp) * HOURS + arrays["hour"]
+        values = arrays["count"].astype(np.intp)
+        width = int(values.max()) + 1 if len(values) else 1
+        histogram = np.bincount(keys * width + values, minlength=WEEKDAYS * HOURS * width)
+        histogram = histogram.reshape(WEEKDAYS * HOURS, width)
+        sketches = []
+        for row in histogram:
+            present = np.flatnonzero(row)
+            sketches.append(HistogramSketch(zip(present.tolist(), row[present].tolist())))
+        buckets = []
+        for weekday in range(WEEKDAYS):
+            for hour in range(HOURS):
+                n = int(grid["count"][weekday, hour])
+                if not n:
+                    buckets.append(_empty_bucket())
+                    continue
+                mean = float(grid["mean"][weekday, hour])
+                std = float(grid["std"][weekday, hour])
+                buckets.append([
+                    n, mean, std * std * n,
+                    int(grid["min"][weekday, hour]), int(grid["max"][weekday, hour]),
+                ])
+        with self._lock:
+            self._buckets = buckets
+            self._sketches = sketches
+            self._source_rows = source_rows
+            self._status_counts = {str(code): int(n) for code, n in enumerate(status_counts) if n}
+            self._first = dataset.earliest().strftime(DATETIME_FORMAT) if len(dataset) else None
+            self._last = dataset.latest().strftime(DATETIME_FORMAT) if len(dataset) else None
+            self._dirty = True
+        self.logger.info(f"🧮 累積集計を再構築: {len(dataset)}件")
+
+    def merge(self, other):
+        """別の集計（同じ形式）を統合"""
+        with self._lock:
+            self._load()
+            other_buckets = other._load()
+            self._buckets = [merge_buckets(pair) for pair in zip(self._buckets, other_buckets)]
+            for sketch, other_sketch in zip(self._sketches, other._sketches):
+                sketch.merge(other_sketch)
+            for code, n in other.status_counts().items():
+                self._status_counts[code] = self._status_counts.get(code, 0) + n
+            first, last = other.date_range()
+            if first is not None:
+                self._first = first if self._first is None else min(self._first, first)
+                self._last = last if self._last is None else max(self._last, last)
+            self._source_rows = max(self._source_rows, 0) + max(other._source_rows, 0)
+            self._dirty = True
+
+    def total(self):
+        with self._lock:
+            return sum(bucket[0] for bucket in self._load())
+
+    def status_counts(self):
+        """ステータスコード別の件数 {"コード": 件数}（不明は "0"）"""
+        with self._lock:
+            self._load()
+            return dict(self._status_counts)
+
+    def date_range(self):
+        """(最古, 最新) の日時文字列（データなしは None）"""
+        with self._lock:
+            self._load()
+            return self._first, self._last
+
+    @staticmethod
+    def _stats(buckets, sketches):
+        """バケット列を {count, mean, std, min, max, p50, p90, p99} の列に変換（データなしはNaN）"""
+        nan = float("nan")
+        names = [quantile_name(q) for q in QUANTILES]
+        stats = {name: [] for name in ["count", "mean", "std", "min", "max", *names]}
+        for (n, mean, m2, minimum, maximum), sketch in zip(buckets, sketches):
+            stats["count"].append(n)
+            stats["mean"].append(mean if n else nan)
+            stats["std"].append(math.sqrt(m2 / n) if n else nan)
+            stats["min"].append(minimum if n else nan)
+            stats["max"].append(maximum if n else nan)
+            for name, value in zip(names, sketch.quantiles(QUANTILES)):
+                stats[name].append(nan if value is None else value)
+        return stats
+
+    def grid(self):
+        """曜日(0=月曜)×時間帯の統計（各値は 7×24 のリスト）"""
+        with self._lock:
+            buckets = self._load()
+            rows = [
+                self._stats(
+                    buckets[weekday * HOURS:(weekday + 1) * HOURS],
+                    self._sketches[weekday * HOURS:(weekday + 1) * HOURS],
+                )
+                for weekday in range(WEEKDAYS)
+            ]
+        return {name: [row[name] for row in rows] for name in rows[0]}
+
+    def hourly_profile(self):
+        """曜日をまとめた時間帯別の統計（各値は長さ24のリスト）"""
+        with self._lock:
+            buckets = self._load()
+            merged = [
+                merge_buckets(buckets[weekday * HOURS + hour] for weekday in range(WEEKDAYS))
+                for hour in range(HOURS)
+            ]
+            sketches = [
+                HistogramSketch.merged(self._sketches[weekday * HOURS + hour] for weekday in range(WEEKDAYS))
+                for hour in range(HOURS)
+            ]
+        return self._stats(merged, sketches)
+
+    def save(self):
+        """変更があれば集計ファイルをアトミックに保存"""
+        with self._lock:
+            if not self._dirty:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.path.with_suffix(".tmp")
+            try:
+                with tmp_file.open("w", encoding="utf-8") as f:
+                    json.dump(
+                        {
+                            "version": FORMAT_VERSION,
+                            "source_rows": self._source_rows,
+                            "status_counts": self._status_counts,
+                            "first": self._first,
+                            "last": self._last,
+                            "buckets": self._buckets,
+                            "sketches": [sketch.to_json() for sketch in self._sketches],
+                        },
+                        f,
+                    )
+                shutil.move(str(tmp_file), str(self.path))
+                self._dirty = False
+            except Exception as e:
+                if tmp_file.exists():
+                    tmp_file.unlink()
+                self.logger.warning(f"累積集計の保存エラー: {e}")
@@ -6,37 +6,82 @@
 - 完全無料実装（EasyOCR + Tesseract）
 """
 
+import argparse
 import csv
+import heapq
 import json
 import re
 import os
+import queue
 import shutil
+import threading
+import time
 import datetime as dt
 from pathlib import Path
 import logging
 from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 
-# 無料OCRライブラリ
-try:
-    import easyocr
-    EASYOCR_AVAILABLE = True
-except ImportError:
-    EASYOCR_AVAILABLE = False
-    logging.warning("EasyOCR not available. Install with: pip install easyocr")
+# 無料OCRライブラリ（初回利用時まで import しない）
+from ocr_engines import EasyOCREngine, TesseractEngine
+from ocr_cache import OCRResultCache
+from crowd_store import PartitionedCSVStore, SQLiteCrowdStore
+from columnar_mirror import ColumnarMirror, source_stamp
+from crowd_dataset import CrowdDataset, DatasetSnapshot
+from running_aggregates import RunningAggregates
+from crowd_forecast import CrowdForecast, SLOT_MINUTES
+from crowd_query import CrowdIndex, parse_date, parse_hours, parse_statuses, parse_weekdays
+from quantile_sketch import HistogramSketch
+from dashboard_payload import build_payload, write_payload
+from directory_watcher import create_watcher
+from image_discovery import ImageManifest
+from image_hash_index import PerceptualHashIndex, difference_hash
+from layout_templates import (
+    LayoutTemplateStore, REGION_CROP_AVAILABLE, image_size, load_region, offset_box,
+)
 
-try:
-    import pytesseract
-    from PIL import Image
-    TESSERACT_AVAILABLE = True
-except ImportError:
-    TESSERACT_AVAILABLE = False
-    logging.warning("Tesseract not available. Install with: pip install pytesseract pillow")
+# analyze / diagnose の起動時間予算（秒、計測は benchmarks/bench_startup.py でも可能）
+STARTUP_BUDGET_SEC = 0.5
 
 
 class GymImageOCRPipeline:
-    def __init__(self):
+    # 人数抽出パターン（既存ロジック流用）
+    PEOPLE_PATTERNS = [
+        r"(\d{1,3})\s*人",
+        r"混雑状況\s*(\d{1,3})",
+        r"現在\s*(\d{1,3})\s*人",
+    ]
+    # OCRカスケードの各段（engine: 使用エンジン, region: ウィジェット領域のみ, accuracy: 精度順位）
+    OCR_TIERS = {
+        "tesseract_roi": {
+            "engine": "tesseract", "region": True, "accuracy": 1,
+            "config": "--psm 6 -c tessedit_char_whitelist=0123456789:人時点混雑雜状況空いてますやや少しかなり混んで普通",
+        },
+        "easyocr_roi": {"engine": "easyocr", "region": True, "accuracy": 3},
+        "easyocr_full": {"engine": "easyocr", "region": False, "accuracy": 4},
+        "tesseract_full": {"engine": "tesseract", "region": False, "accuracy": 2},
+    }
+    # 既定のカスケード順（安価な段から）
+    DEFAULT_OCR_CASCADE = ["tesseract_roi", "easyocr_roi", "easyocr_full", "tesseract_full"]
+    # ステータス表記の人数範囲に対する許容誤差（人）
+    STATUS_RANGE_TOLERANCE = 5
+    # CSVの列構成
+    CSV_FIELDNAMES = [
+        "datetime", "date", "time", "hour", "weekday",
+        "count", "status_label", "status_code", "status_min", "status_max", "raw_text"
+    ]
+    # 時系列順でない追記行がこの件数を超えたらCSVを圧縮（再ソート・再書き込み）
+    COMPACTION_THRESHOLD = 50
+    # 混雑ウィジェットを構成するテキスト断片（レイアウト学習用）
+    WIDGET_FRAGMENT_PATTERN = re.compile(r"混[雑雜]状況|\d{1,3}\s*人|時点|空いて|混んで|混雑|普通")
+
+    # 保存先バックエンド（csv: CSVのみ, sqlite / partitioned: 各ストアを正としCSVはエクスポート）
+    STORE_BACKENDS = ("csv", "sqlite", "partitioned")
+
+    def __init__(self, ocr_cascade=None, ocr_min_confidence=0.5, store="csv"):
         self.project_dir = Path("/Users/i_kawano/Documents/training_waitnum_analysis")
         self.csv_file = self.project_dir / "data" / "fit_place24_data.csv"
+        self.csv_meta_file = self.csv_file.with_name(self.csv_file.name + ".meta.json")
         self.backup_dir = self.project_dir / "backups"
         self.log_file = self.project_dir / "logs" / "weekly_ocr.log"
         
@@ -45,6 +90,7 @@ class GymImageOCRPipeline:
         self.archive_base = self.project_dir / "archive" / "screens"
         self.processed_dir = self.archive_base / "processed"
         self.failed_dir = self.archive_base / "failed"
+        self.cache_dir = self.project_dir / "cache"
         
         # ステータスマッピング（既存ロジック流用）
         self.status_map = {
@@ -61,14 +107,59 @@ class GymImageOCRPipeline:
         self._setup_directories()
         self._setup_logging()
         
-        # OCRエンジン初期化（ログ設定後に実行）
-        self.easyocr_reader = None
-        if EASYOCR_AVAILABLE:
-            try:
-                self.easyocr_reader = easyocr.Reader(['ja', 'en'], gpu=False)
-                self.logger.info("EasyOCR初期化完了")
-            except Exception as e:
-                self.logger.warning(f"EasyOCR初期化失敗: {e}")
+        # CSV追記・圧縮の排他制御
+        self._store_lock = threading.RLock()
+        self._compaction_thread = None
+        
+        # 保存先ストア（SQLite / 月別CSV、いずれもCSVは追記エクスポート）
+        if store not in self.STORE_BACKENDS:
+            raise ValueError(f"不明な保存先: {store}")
+        self.crowd_store = None
+        if store == "sqlite":
+            self.crowd_store = SQLiteCrowdStore(self.csv_file.with_suffix(".db"), logger=self.logger)
+        elif store == "partitioned":
+            self.crowd_store = PartitionedCSVStore(self.csv_file.parent, logger=self.logger)
+        
+        # 分析用の列指向ミラー（pyarrow導入時のみ）
+        self.columnar_mirror = ColumnarMirror(self.csv_file.with_suffix(".parquet"), logger=self.logger)
+        
+        # 曜日×時間帯の累積集計（コミットされた行だけで増分更新）
+        self.aggregates = RunningAggregates(self.cache_dir / "crowd_aggregates.json", logger=self.logger)
+        # 15分枠の混雑予測（同じくコミットされた行だけで増分学習）
+        self.forecast = CrowdForecast(self.cache_dir / "crowd_forecast.json", logger=self.logger)
+        # 集計済みペイロードの出力先（ダッシュボードが生CSVの代わりに読み込む）
+        self.dashboard_public_dir = self.project_dir / "crowd-dashboard-modern" / "public"
+        
+        # OCRエンジン（初回のOCR実行時に遅延初期化）
+        self.easyocr = EasyOCREngine(['ja', 'en'], gpu=False, logger=self.logger)
+        self.tesseract = TesseractEngine(lang='jpn+eng', logger=self.logger)
+        
+        # OCRカスケード設定
+        self.ocr_cascade = list(ocr_cascade or self.DEFAULT_OCR_CASCADE)
+        unknown_tiers = [tier for tier in self.ocr_cascade if tier not in self.OCR_TIERS]
+        if unknown_tiers:
+            raise ValueError(f"不明なOCR段: {', '.join(unknown_tiers)}")
+        self.ocr_min_confidence = ocr_min_confidence
+        
+        # 画像内容(SHA-256)をキーにしたOCR結果キャッシュ
+        self.ocr_cache = OCRResultCache(self.cache_dir / "ocr", logger=self.logger)
+        
+        # 処理済み画像マニフェスト（未処理・変更ありの画像のみを検出）
+        self.image_manifest = ImageManifest(self.cache_dir / "image_manifest.json", logger=self.logger)
+        self._discovered_stats = {}
+        
+        # 取り込み済み画像の知覚ハッシュ索引（近似重複はOCRを省略）
+        self.phash_index = PerceptualHashIndex(self.cache_dir / "phash_index.json", logger=self.logger)
+        
+        # 解像度別ウィジェット領域テンプレート
+        self.layout_templates = LayoutTemplateStore(
+            self.cache_dir / "layout_templates.json", logger=self.logger
+        )
+
+    @property
+    def easyocr_reader(self):
+        """EasyOCR Reader（初回アクセス時に初期化）"""
+        return self.easyocr.reader
 
     def _setup_directories(self):
         """必要なディレクトリを作成"""
@@ -91,48 +182,226 @@ class GymImageOCRPipeline:
         self.logger = logging.getLogger(__name__)
 
     def find_new_images(self):
-        """iCloudから新しい画像ファイルを検索"""
+        """iCloudから新しい画像ファイルを検索（マニフェストで処理済みを除外）"""
         if not self.icloud_images.exists():
             self.logger.error(f"iCloudディレクトリが存在しません: {self.icloud_images}")
             return []
         
-        # PNG画像を検索（ファイル名パターン: FP24_20250815_222321.png or 2025:08:15, 22:23.png）
-        image_files = []
-        for pattern in ["*.png", "*.PNG", "*.jpg", "*.JPEG"]:
-            for img_path in self.icloud_images.glob(pattern):
-                if img_path.is_file():
-                    image_files.append(img_path)
+        # PNG/JPEG画像を1回の走査で検索（ファイル名パターン: FP24_20250815_222321.png or 2025:08:15, 22:23.png）
+        discovered = self.image_manifest.discover(self.icloud_images)
+        self._discovered_stats = {image_path: stat for image_path, stat in discovered}
+        self.image_manifest.save()
         
-        self.logger.info(f"iCloudから{len(image_files)}個の画像ファイルを発見")
-        return sorted(image_files, key=lambda x: x.stat().st_mtime)
+        self.logger.info(f"iCloudから{len(discovered)}個の未処理画像ファイルを発見")
+        return [image_path for image_path, _ in discovered]
 
-    def extract_text_from_image(self, image_path):
-        """画像からテキストを抽出（EasyOCR → Tesseract フォールバック）"""
-        extracted_text = ""
+    def mark_image_seen(self, image_path, digest=None):
+        """画像をマニフェストに処理済みとして記録（アーカイブ移動前に呼ぶ、digestがあれば再計算しない）"""
+        stat = self._discovered_stats.pop(image_path, None)
+        try:
+            self.image_manifest.mark(image_path, stat or image_path.stat(), sha256=digest)
+        except OSError as e:
+            self.logger.warning(f"画像マニフェスト記録エラー {image_path.name}: {e}")
+
+    def extract_text_from_image(self, image_path, report=None, digest=None):
+        """画像からテキストを抽出（安価な段から順にOCRし、確信度が十分なら打ち切り）"""
+        digest = digest or self.ocr_cache.image_digest(image_path)
+        candidates = []
         
-        # Primary: EasyOCR
-        if self.easyocr_reader:
-            try:
-                results = self.easyocr_reader.readtext(str(image_path))
-                text_parts = [result[1] for result in results if result[2] > 0.3]  # 信頼度30%以上
-                extracted_text = " ".join(text_parts)
-                self.logger.info(f"EasyOCR抽出成功: {len(text_parts)}個のテキスト要素")
-            except Exception as e:
-                self.logger.warning(f"EasyOCR失敗: {e}")
+        # いずれかの段に確信度十分なキャッシュがあれば即座に返す（領域OCR段は現在の切り出し領域で参照）
+        region = None
+        if any(self.OCR_TIERS[tier]["region"] for tier in self.ocr_cascade):
+            region = self._widget_region(image_path)
+        for tier in self.ocr_cascade:
+            engine = self._tier_engine(tier)
+            tier_region = region if self.OCR_TIERS[tier]["region"] else None
+            if not engine.available or (self.OCR_TIERS[tier]["region"] and not region):
+                continue
+            fragments = self.ocr_cache.get(digest, tier, engine.version, tier_region)
+            if fragments and self.is_confident_reading(self.join_fragments(fragments), fragments):
+                if report is not None:
+                    report.append({"tier": tier, "seconds": 0.0, "accepted": True})
+                return self.join_fragments(fragments)
+        
+        for tier in self.ocr_cascade:
+            started = time.perf_counter()
+            fragments = self._tier_fragments(tier, image_path, digest)
+            if fragments is None:
+                continue  # エンジン未導入、または未学習の解像度での領域OCR段
+            elapsed = time.perf_counter() - started
+            
+            extracted_text = self.join_fragments(fragments)
+            confident = self.is_confident_reading(extracted_text, fragments)
+            if report is not None:
+                report.append({"tier": tier, "seconds": elapsed, "accepted": confident})
+            self.logger.debug(f"{tier}: {elapsed * 1000:.0f}ms, 確信度{'OK' if confident else '不足'}")
+            
+            if confident:
+                return extracted_text
+            if extracted_text:
+                candidates.append((self.OCR_TIERS[tier]["accuracy"], extracted_text))
+        
+        # どの段も確信度不足: 人数が読めた中で最も精度の高い段の結果を採用
+        with_count = [c for c in candidates if self.has_crowd_count(c[1])]
+        if with_count or candidates:
+            return max(with_count or candidates, key=lambda c: c[0])[1]
+        
+        self.logger.error(f"OCR抽出失敗: {image_path}")
+        return ""
+
+    def _tier_fragments(self, tier, image_path, digest):
+        """1段分のOCR断片を取得（キャッシュ優先）。実行対象外の段はNone"""
+        spec = self.OCR_TIERS[tier]
+        engine = self._tier_engine(tier)
+        if not engine.available:
+            return None
+        region = None
+        if spec["region"]:
+            region = self._widget_region(image_path)
+            if not region:
+                return None
+        try:
+            return self._cached_fragments(
+                digest, tier, engine, lambda: self._run_ocr_tier(tier, image_path, region), region
+            )
+        except Exception as e:
+            self.logger.warning(f"{tier} OCR失敗: {e}")
+            return []
+
+    def _tier_engine(self, tier):
+        """段が使用するOCRエンジン"""
+        return self.easyocr if self.OCR_TIERS[tier]["engine"] == "easyocr" else self.tesseract
+
+    @staticmethod
+    def join_fragments(fragments):
+        """信頼度30%以上のテキスト断片を連結"""
+        return " ".join(text for _, text, conf in fragments if conf is None or conf > 0.3).strip()
+
+    def _cached_fragments(self, digest, cache_name, engine, run_ocr, region=None):
+        """OCRキャッシュを参照し、ミス時のみOCRを実行して保存（領域OCRは切り出し領域もキーに含む）"""
+        fragments = self.ocr_cache.get(digest, cache_name, engine.version, region)
+        if fragments is not None:
+            self.logger.debug(f"OCRキャッシュヒット: {cache_name} {digest[:12]}")
+            return fragments
+        
+        fragments = run_ocr()
+        self.ocr_cache.put(digest, cache_name, engine.version, fragments, region)
+        return fragments
+
+    def _widget_region(self, image_path):
+        """学習済みのウィジェット領域を返す（未学習・切り出し不可ならNone）"""
+        if not REGION_CROP_AVAILABLE:
+            return None
+        return self.layout_templates.get(*image_size(image_path))
+
+    def _run_ocr_tier(self, tier, image_path, region=None):
+        """カスケードの1段を実行し [(box, text, conf), ...] を返す（ボックスは元画像座標）"""
+        spec = self.OCR_TIERS[tier]
         
-        # Fallback: Tesseract OCR
-        if not extracted_text and TESSERACT_AVAILABLE:
+        if spec["engine"] == "tesseract":
+            text = self.tesseract.image_to_string(image_path, region=region, config=spec.get("config", ""))
+            return [(None, text, None)]
+        
+        if region:
+            results = self.easyocr.readtext(load_region(image_path, region))
+        else:
+            results = self.easyocr.readtext(str(image_path))
+        return self._easyocr_fragments(image_path, results, region)
+
+    def _easyocr_fragments(self, image_path, results, region=None):
+        """EasyOCR結果を元画像座標の断片に変換し、全体OCRならレイアウトを学習"""
+        dx, dy = (region[0], region[1]) if region else (0, 0)
+        fragments = [(offset_box(box, dx, dy), text, float(conf)) for box, text, conf in results]
+        
+        # 全体OCRで人数が読めた場合はウィジェット要素のボックスから領域を学習
+        if not region and REGION_CROP_AVAILABLE and self.has_crowd_count(self.join_fragments(fragments)):
+            widget_boxes = [
+                box for box, text, conf in fragments
+                if conf > 0.3 and self.WIDGET_FRAGMENT_PATTERN.search(text)
+            ]
+            self.layout_templates.learn(*image_size(image_path), widget_boxes)
+        
+        return fragments
+
+    def prefetch_easyocr_batched(self, image_files, batch_size=8):
+        """EasyOCR段を同一サイズの画像ごとにバッチ推論し、結果をOCRキャッシュに格納"""
+        pending = list(image_files)
+        for tier in self.ocr_cascade:
+            if not pending:
+                break
+            spec = self.OCR_TIERS[tier]
+            if spec["engine"] == "easyocr" and self.easyocr.available:
+                self._run_easyocr_batched(tier, pending, batch_size)
+            # この段で確信度が得られた画像は以降の段をバッチ対象から外す
+            pending = [image_path for image_path in pending if not self._tier_confident(tier, image_path)]
+
+    def _tier_confident(self, tier, image_path):
+        """1段のみを実行（キャッシュ優先）し、確信度が十分か判定"""
+        fragments = self._tier_fragments(tier, image_path, self.ocr_cache.image_digest(image_path))
+        return bool(fragments) and self.is_confident_reading(self.join_fragments(fragments), fragments)
+
+    def _run_easyocr_batched(self, tier, image_files, batch_size):
+        """キャッシュ未登録の画像を入力サイズ別にまとめてreadtext_batchedで推論"""
+        spec = self.OCR_TIERS[tier]
+        version = self.easyocr.version
+        
+        # 入力サイズ（領域OCRは切り出し後のサイズ）ごとにグループ化
+        groups = defaultdict(list)
+        for image_path in image_files:
             try:
-                image = Image.open(image_path)
-                extracted_text = pytesseract.image_to_string(image, lang='jpn+eng')
-                self.logger.info("Tesseract OCR抽出成功")
+                digest = self.ocr_cache.image_digest(image_path)
+                region = self._widget_region(image_path) if spec["region"] else None
+                if spec["region"] and not region:
+                    continue
+                if self.ocr_cache.get(digest, tier, version, region) is not None:
+                    continue
+                if region:
+                    shape = (region[2] - region[0], region[3] - region[1])
+                else:
+                    shape = image_size(image_path)
+                groups[shape].append((image_path, digest, region))
             except Exception as e:
-                self.logger.warning(f"Tesseract OCR失敗: {e}")
+                self.logger.warning(f"バッチOCR準備エラー {Path(image_path).name}: {e}")
+        
+        for shape, items in groups.items():
+            for start in range(0, len(items), batch_size):
+                chunk = items[start:start + batch_size]
+                started = time.perf_counter()
+                try:
+                    images = [load_region(image_path, region) for image_path, _, region in chunk]
+                    batch_results = self.easyocr.readtext_batched(images, batch_size=batch_size)
+                except Exception as e:
+                    self.logger.warning(f"{tier} バッチOCR失敗 ({shape[0]}x{shape[1]}): {e}")
+                    continue
+                for (image_path, digest, region), results in zip(chunk, batch_results):
+                    fragments = self._easyocr_fragments(image_path, results, region)
+                    self.ocr_cache.put(digest, tier, version, fragments, region)
+                elapsed = time.perf_counter() - started
+                self.logger.info(
+                    f"📦 {tier} バッチOCR: {len(chunk)}枚 ({shape[0]}x{shape[1]}) "
+                    f"{elapsed:.2f}s, {len(chunk) / max(elapsed, 1e-9):.2f}枚/s"
+                )
+
+    def has_crowd_count(self, text):
+        """テキストに人数情報が含まれるか"""
+        return any(re.search(pattern, text) for pattern in self.PEOPLE_PATTERNS)
+
+    def is_confident_reading(self, text, fragments):
+        """人数とステータスが読め、互いに矛盾せず、OCR信頼度も十分か"""
+        people_count, status_text = self._extract_count_and_status(text)
+        if people_count is None or not status_text:
+            return False
         
-        if not extracted_text:
-            self.logger.error(f"OCR抽出失敗: {image_path}")
+        # ステータス表記の人数範囲から大きく外れる人数は誤読とみなす
+        status_info = self._generate_status_info(people_count, status_text)
+        tolerance = self.STATUS_RANGE_TOLERANCE
+        if not status_info["min"] - tolerance <= people_count <= status_info["max"] + tolerance:
+            return False
         
-        return extracted_text.strip()
+        confidences = [conf for _, _, conf in fragments if conf is not None]
+        if confidences and sum(confidences) / len(confidences) < self.ocr_min_confidence:
+            return False
+        return True
 
     def parse_filename_timestamp(self, image_path):
         """ファイル名から日時情報を抽出"""
@@ -165,17 +434,11 @@ class GymImageOCRPipeline:
         self.logger.info(f"ファイル名から日時抽出失敗、ファイル更新日時を使用: {file_mtime}")
         return file_mtime
 
-    def parse_gym_data(self, text, timestamp):
-        """既存の正規表現ロジックでジムデータを解析"""
+    def _extract_count_and_status(self, text):
+        """テキストから人数とステータス文言を抽出"""
         # 人数抽出（既存ロジック流用）
-        people_patterns = [
-            r"(\d{1,3})\s*人",
-            r"混雑状況\s*(\d{1,3})",
-            r"現在\s*(\d{1,3})\s*人",
-        ]
-        
         people_count = None
-        for pattern in people_patterns:
+        for pattern in self.PEOPLE_PATTERNS:
             match = re.search(pattern, text)
             if match:
                 people_count = int(match.group(1))
@@ -201,6 +464,12 @@ class GymImageOCRPipeline:
                 status_text = pattern
                 break
         
+        return people_count, status_text
+
+    def parse_gym_data(self, text, timestamp):
+        """既存の正規表現ロジックでジムデータを解析"""
+        people_count, status_text = self._extract_count_and_status(text)
+        
         # データ構造化
         if people_count is not None:
             # 既存の_generate_status_infoロジックを適用
@@ -251,6 +520,12 @@ class GymImageOCRPipeline:
             else:
                 return {"code": 1, "label": "かなり混んでいます（~50人）", "min": 41, "max": 50}
 
+    def status_code_for_text(self, status_text):
+        """ステータス表記 → コード（_generate_status_info のテキスト判定に該当しない表記は None）"""
+        # テキストで判定できない表記は人数ベースの判定になり、人数によってコードが変わる
+        codes = {self._generate_status_info(people_count, status_text)["code"] for people_count in (0, 50)}
+        return codes.pop() if len(codes) == 1 else None
+
     def read_existing_csv_data(self):
         """既存のCSVデータを読み込み（既存ロジック流用）"""
         existing_data = []
@@ -270,39 +545,76 @@ class GymImageOCRPipeline:
         
         return existing_data, existing_keys
 
-    def dedupe_data(self, all_data):
-        """重複データを除去（既存ロジック流用）"""
+    def iter_csv_rows(self):
+        """既存CSVを1行ずつ読み込むジェネレータ（全件をメモリに載せない）"""
+        if not self.csv_file.exists():
+            return
+        with self.csv_file.open(newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+
+    @staticmethod
+    def dedupe_key(row):
+        """重複チェック用キー（日時+場所+人数）"""
+        return (row.get("datetime", ""), "矢向", str(row.get("count", "")))
+
+    @staticmethod
+    def _in_order_rows(rows, strays=None):
+        """日時が後退しない行だけを流し、後退した（追記で順序が乱れた）行はstraysに退避"""
+        running_max = ""
+        for row in rows:
+            value = row.get("datetime", "")
+            if value < running_max:
+                if strays is not None:
+                    strays.append(row)
+                continue
+            running_max = value
+            yield row
+
+    def merge_dedupe(self, *sorted_streams):
+        """日時順の複数ストリームをマージし、重複を除いて日時順に流す（O(n+m)）"""
+        current_datetime = None
         seen = set()
-        unique_data = []
-        
-        for row in sorted(all_data, key=lambda x: x.get("datetime", "")):
-            # 重複チェックキー
-            key = (row.get("datetime", ""), "矢向", str(row.get("count", "")))
-            
+        for row in heapq.merge(*sorted_streams, key=lambda x: x.get("datetime", "")):
+            key = self.dedupe_key(row)
+            # 日時順なので重複は同じ日時の範囲内にしか現れない
+            if key[0] != current_datetime:
+                current_datetime = key[0]
+                seen = set()
             if key in seen:
                 self.logger.debug(f"重複データをスキップ: {key}")
                 continue
-            
             seen.add(key)
-            unique_data.append(row)
+            yield row
+
+    def dedupe_data(self, all_data, quiet=False):
+        """重複データを除去（日時順に並べ、同一日時内でのみ重複判定）"""
+        unique_data = list(self.merge_dedupe(sorted(all_data, key=lambda x: x.get("datetime", ""))))
         
         removed = len(all_data) - len(unique_data)
-        if removed > 0:
+        if removed > 0 and not quiet:
             self.logger.info(f"重複データ{removed}件を除去")
         
         return unique_data
 
+    def _log_duplicates(self, new_data, batch, new_rows):
+        """コミット時の重複除去件数をバッチ内・既存データとの重複に分けて記録"""
+        in_batch = len(new_data) - len(batch)
+        existing = len(batch) - len(new_rows)
+        if in_batch > 0:
+            self.logger.info(f"バッチ内の重複{in_batch}件を除去")
+        if existing > 0:
+            self.logger.info(f"既存データとの重複{existing}件を除去")
+
     def write_csv(self, data):
-        """CSVファイルに書き込み（既存ロジック流用）"""
-        fieldnames = [
-            "datetime", "date", "time", "hour", "weekday",
-            "count", "status_label", "status_code", "status_min", "status_max", "raw_text"
-        ]
+        """CSVファイルに書き込み（dataはリスト・ジェネレータのどちらでも可）"""
+        fieldnames = self.CSV_FIELDNAMES
         
         # 一時ファイルに書き込み後、アトミック移動
         tmp_file = self.csv_file.with_suffix(".tmp.csv")
         
         try:
+            row_count = 0
+            last_datetime = ""
             with tmp_file.open("w", encoding="utf-8", newline="") as f:
                 writer = csv.DictWriter(f, fieldnames=fieldnames)
                 writer.writeheader()
@@ -311,10 +623,15 @@ class GymImageOCRPipeline:
                     # フィールド名に合わせてデータを整理
                     clean_row = {field: row.get(field, "") for field in fieldnames}
                     writer.writerow(clean_row)
+                    row_count += 1
+                    last_datetime = max(last_datetime, clean_row["datetime"])
             
             # アトミック移動
             shutil.move(str(tmp_file), str(self.csv_file))
-            self.logger.info(f"CSVファイル更新完了: {len(data)}件")
+            self.logger.info(f"CSVファイル更新完了: {row_count}件")
+            
+            # 全件書き直し後は時系列順に整列済み
+            self._save_csv_meta({"rows": row_count, "last_datetime": last_datetime, "unsorted_rows": 0})
             return True
             
         except Exception as e:
@@ -323,6 +640,168 @@ class GymImageOCRPipeline:
             self.logger.error(f"CSV書き込みエラー: {e}")
             return False
 
+    def append_csv(self, rows):
+        """重複除去済みの新しい行だけをCSV末尾に追記（fsyncは1回）"""
+        fieldnames = self.CSV_FIELDNAMES
+        meta = self.load_csv_meta()
+        rows = sorted(rows, key=lambda row: row.get("datetime", ""))
+        previous_stamp = source_stamp(self.csv_file) if self.csv_file.exists() else None
+        
+        try:
+            write_header = not self.csv_file.exists() or self.csv_file.stat().st_size == 0
+            with self.csv_file.open("a", encoding="utf-8", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=fieldnames)
+                if write_header:
+                    writer.writeheader()
+                for row in rows:
+                    writer.writerow({field: row.get(field, "") for field in fieldnames})
+                f.flush()
+                os.fsync(f.fileno())
+        except Exception as e:
+            self.logger.error(f"CSV追記エラー: {e}")
+            return False
+        
+        # 既存の最終日時より古い行は「順序外」として計上
+        last_datetime = meta["last_datetime"]
+        unsorted = sum(1 for row in rows if row.get("datetime", "") < last_datetime)
+        self._save_csv_meta({
+            "rows": meta["rows"] + len(rows),
+            "last_datetime": max(last_datetime, rows[-1].get("datetime", "")) if rows else last_datetime,
+            "unsorted_rows": meta["unsorted_rows"] + unsorted,
+        })
+        self.logger.info(f"CSVファイル追記完了: {len(rows)}件（順序外 {unsorted}件）")
+        # 列指向ミラーにも追記分だけを書き足す（読み込み時にCSV全体を再変換しない）
+        if self.columnar_mirror.available:
+            self.columnar_mirror.append(rows, previous_stamp, self.csv_file)
+        return True
+
+    def load_csv_meta(self):
+        """CSVのメタ情報（行数・最終日時・順序外行数）を取得（CSVと不整合なら再計算）"""
+        if not self.csv_file.exists():
+            return {"rows": 0, "last_datetime": "", "unsorted_rows": 0}
+        
+        stat = self.csv_file.stat()
+        try:
+            with self.csv_meta_file.open(encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("size") == stat.st_size and meta.get("mtime_ns") == stat.st_mtime_ns:
+                return meta
+        except (OSError, ValueError):
+            pass
+        
+        # メタ情報がない・CSVが外部で編集された場合は1回走査して再構築
+        rows = 0
+        unsorted = 0
+        last_datetime = ""
+        with self.csv_file.open(newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                rows += 1
+                value = row.get("datetime", "")
+                if value < last_datetime:
+                    unsorted += 1
+                else:
+                    last_datetime = value
+        return self._save_csv_meta({"rows": rows, "last_datetime": last_datetime, "unsorted_rows": unsorted})
+
+    def _save_csv_meta(self, meta):
+        """CSVの現在のサイズ・更新日時とともにメタ情報を保存"""
+        stat = self.csv_file.stat()
+        meta = dict(meta, size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+        try:
+            tmp_file = self.csv_meta_file.with_suffix(".tmp")
+            with tmp_file.open("w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            shutil.move(str(tmp_file), str(self.csv_meta_file))
+        except OSError as e:
+            self.logger.warning(f"CSVメタ情報保存エラー: {e}")
+        return meta
+
+    def compact_csv(self):
+        """CSVを再ソート・重複除去して全件書き直し（圧縮）"""
+        with self._store_lock:
+            self.logger.info("🗜️ CSVを圧縮中（再ソート・重複除去）...")
+            # 1回目の走査で順序外の行だけを集め（件数は圧縮閾値程度）、ソート
+            strays = []
+            for _ in self._in_order_rows(self.iter_csv_rows(), strays):
+                pass
+            strays.sort(key=lambda x: x.get("datetime", ""))
+            
+            # 2回目の走査で整列済みの行と順序外の行をマージしながら書き出し
+            if not self.write_csv(self.merge_dedupe(self._in_order_rows(self.iter_csv_rows()), strays)):
+                return False
+            self.rebuild_columnar_mirror()
+            return True
+
+    def _schedule_compaction(self):
+        """順序外の行が閾値を超えていればバックグラウンドで圧縮"""
+        if self.load_csv_meta()["unsorted_rows"] <= self.COMPACTION_THRESHOLD:
+            return
+        if self._compaction_thread and self._compaction_thread.is_alive():
+            return
+        self._compaction_thread = threading.Thread(target=self.compact_csv, name="csv-compaction")
+        self._compaction_thread.start()
+
+    def wait_for_compaction(self):
+        """実行中の圧縮処理の完了を待つ"""
+        if self._compaction_thread:
+            self._compaction_thread.join()
+            self._compaction_thread = None
+
+    def rebuild_columnar_mirror(self):
+        """CSVの全件書き直し（圧縮・エクスポート）後に列指向ミラーを再生成"""
+        if self.columnar_mirror.available and self.csv_file.exists():
+            with self._store_lock:
+                self.columnar_mirror.rebuild(self.csv_file)
+
+    def read_mirror_arrays(self, since=None, until=None):
+        """列指向ミラーから分析用の NumPy 配列を読み込む（pyarrow未導入・読み込み失敗時はNone）
+
+        ミラーはコミット・圧縮時に更新済みのため、再生成するのはCSVが外部で編集された場合のみ。
+        """
+        if not (self.columnar_mirror.available and self.csv_file.exists()):
+            return None
+        try:
+            with self._store_lock:
+                if not self.columnar_mirror.is_fresh(self.csv_file) and not self.columnar_mirror.rebuild(self.csv_file):
+                    return None
+                return self.columnar_mirror.read_arrays(since, until)
+        except Exception as e:
+            self.logger.warning(f"列指向ミラー読み込みエラー、CSVから読み込みます: {e}")
+            return None
+
+    def load_dataset(self, since=None, until=None):
+        """分析用の型付き列データを読み込む（保存先ストア使用時はCSVエクスポートではなくストアから）
+
+        since / until（"YYYY-MM-DD HH:MM:SS"、両端を含む）を指定すると期間内の行だけを読み込む
+        （月別パーティションでは重なる月のファイルのみを開く）。
+        """
+        if self.crowd_store is not None:
+            # 集計・予測は保存先の行数と突き合わせるため、同じ保存先から読み込む
+            with self._store_lock:
+                self._seed_crowd_store()
+                return CrowdDataset.from_rows(self.crowd_store.iter_rows(since, until))
+        arrays = self.read_mirror_arrays(since, until)
+        if arrays is not None:
+            return CrowdDataset.from_arrays(**arrays)
+        rows = self.iter_csv_rows()
+        if since or until:
+            rows = (
+                row for row in rows
+                if (not since or row.get("datetime", "") >= since) and (not until or row.get("datetime", "") <= until)
+            )
+        return CrowdDataset.from_rows(rows)
+
+    def load_snapshot(self):
+        """実行中に各段で共有するスナップショットを保存先から1回だけ読み込む"""
+        if self.crowd_store is not None:
+            with self._store_lock:
+                self._seed_crowd_store()
+                return DatasetSnapshot.from_rows(self.crowd_store.iter_rows())
+        arrays = self.read_mirror_arrays()
+        if arrays is not None:
+            return DatasetSnapshot.from_arrays(**arrays)
+        return DatasetSnapshot.from_rows(self.iter_csv_rows())
+
     def archive_image(self, image_path, success=True):
         """処理済み画像をアーカイブ"""
         timestamp = dt.datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -340,48 +819,199 @@ class GymImageOCRPipeline:
             self.logger.error(f"画像アーカイブエラー: {e}")
             return False
 
-    def analyze_data(self):
-        """データ分析を実行（既存ロジック流用）"""
+    def store_row_count(self):
+        """保存先の総行数（CSVはメタデータから取得）"""
+        if self.crowd_store is not None:
+            return self.crowd_store.count()
+        return self.load_csv_meta()["rows"]
+
+    def store_version(self):
+        """保存先の内容のバージョン（変更検知用、内容が変わると変わる文字列）"""
+        if self.crowd_store is not None:
+            return f"{self.crowd_store.count()}:{self.crowd_store.latest_datetime()}"
+        if not self.csv_file.exists():
+            return "empty"
+        stamp = source_stamp(self.csv_file)
+        return f"{stamp['size']}:{stamp['mtime_ns']}"
+
+    def refresh_aggregates(self, dataset=None):
+        """累積集計が保存先と対応していなければ全件から再構築"""
+        source_rows = self.store_row_count()
+        if self.aggregates.matches(source_rows):
+            return
+        if dataset is None:
+            dataset = self.load_dataset()
+        self.aggregates.rebuild(dataset, source_rows)
+        self.aggregates.save()
+
+    def refresh_forecast(self, dataset=None):
+        """予測モデルが保存先と対応していなければ全件から再学習"""
+        source_rows = self.store_row_count()
+        if not self.forecast.matches(source_rows):
+            if dataset is None:
+                dataset = self.load_dataset()
+            self.forecast.rebuild(dataset, source_rows)
+        self.forecast.save()
+
+    def record_committed_rows(self, rows):
+        """コミットした行で累積集計と予測モデルを増分更新"""
+        self.aggregates.add_rows(rows)
+        self.aggregates.save()
+        self.forecast.add_rows(rows)
+        self.forecast.save()
+
+    def publish_dashboard_payload(self, dataset=None):
+        """累積集計からダッシュボード用の集計済みペイロードを出力"""
         try:
-            existing_data, _ = self.read_existing_csv_data()
+            self.refresh_aggregates(dataset)
+            directories = [self.csv_file.parent]
+            if self.dashboard_public_dir.exists():
+                directories.append(self.dashboard_public_dir)
+            write_payload(build_payload(self.aggregates), directories, logger=self.logger)
+        except Exception as e:
+            self.logger.warning(f"ダッシュボード集計の出力エラー: {e}")
+
+    def analyze_data(self, dataset=None):
+        """データ分析を実行（累積集計から O(168) で算出、未対応時のみ全件から再構築）"""
+        try:
+            self.refresh_aggregates(dataset)
+            total_count = self.aggregates.total()
             
-            if not existing_data:
+            if not total_count:
                 self.logger.warning("分析対象データがありません")
                 return
             
             # 時間帯別分析
-            hourly_analysis = defaultdict(list)
-            
-            for row in existing_data:
-                if row.get("hour") and row.get("count"):
-                    try:
-                        hour = int(row["hour"])
-                        count = int(row["count"])
-                        hourly_analysis[hour].append(count)
-                    except ValueError:
-                        continue
+            profile = self.aggregates.hourly_profile()
             
-            self.logger.info(f"📊 データ分析結果（総データ数: {len(existing_data)}件）")
+            self.logger.info(f"📊 データ分析結果（総データ数: {total_count}件）")
             
-            # 最適時間帯
-            best_times = []
-            for hour in sorted(hourly_analysis.keys()):
-                counts = hourly_analysis[hour]
-                avg_count = sum(counts) / len(counts)
-                if avg_count <= 15:
-                    best_times.append((hour, avg_count))
+            # 最適時間帯（p90: 10回に1回はこの人数以上になる目安）
+            best_times = [
+                (hour, float(profile["mean"][hour]), float(profile["p90"][hour]))
+                for hour in range(len(profile["count"]))
+                if profile["count"][hour] and profile["mean"][hour] <= 15
+            ]
             
             if best_times:
                 best_times.sort(key=lambda x: x[1])
                 self.logger.info("🎯 最適利用時間帯（空いている時間帯）:")
-                for hour, avg in best_times:
-                    self.logger.info(f"  {hour:2d}:00 - 平均 {avg:.1f}人 ⭐️")
+                for hour, avg, p90 in best_times:
+                    self.logger.info(f"  {hour:2d}:00 - 平均 {avg:.1f}人 (p90 {p90:.0f}人) ⭐️")
+            
+            # 混雑の上振れ（曜日×時間帯の p90 上位）
+            grid = self.aggregates.grid()
+            worst = sorted(
+                (
+                    (grid["p90"][weekday][hour], grid["p50"][weekday][hour], grid["p99"][weekday][hour], weekday, hour)
+                    for weekday in range(len(grid["count"]))
+                    for hour in range(len(grid["count"][weekday]))
+                    if grid["count"][weekday][hour]
+                ),
+                reverse=True,
+            )[:5]
+            if worst:
+                self.logger.info("📈 混雑しやすい曜日×時間帯（p50 / p90 / p99）:")
+                for p90, p50, p99, weekday, hour in worst:
+                    self.logger.info(
+                        f"  {'月火水木金土日'[weekday]} {hour:2d}:00 - {p50:.0f} / {p90:.0f} / {p99:.0f}人"
+                    )
+            
+            self.forecast_report(dataset)
             
         except Exception as e:
             self.logger.error(f"分析エラー: {e}")
 
-    def update_readme_stats(self, total_count: int, latest_date: str):
-        """README.mdの統計情報を自動更新"""
+    def forecast_report(self, dataset=None, slots_per_day=3):
+        """今後7日間の予測から各日の空いている15分枠を表示"""
+        self.refresh_forecast(dataset)
+        days = self.forecast.forecast()
+        if not days:
+            self.logger.warning("予測対象データがありません")
+            return
+        
+        self.logger.info("🔮 今後7日間の混雑予測（空いている15分枠）:")
+        for date, slots in days:
+            predicted = [(count, slot) for slot, count in enumerate(slots) if count is not None]
+            if not predicted:
+                continue
+            quiet = sorted(predicted)[:slots_per_day]
+            peak_count, peak_slot = max(predicted)
+            times = ", ".join(
+                f"{slot * SLOT_MINUTES // 60:02d}:{slot * SLOT_MINUTES % 60:02d} {count:.0f}人"
+                for count, slot in sorted(quiet, key=lambda x: x[1])
+            )
+            self.logger.info(
+                f"  {date:%m/%d}({'月火水木金土日'[date.weekday()]}) {times} "
+                f"/ ピーク {peak_slot * SLOT_MINUTES // 60:02d}:{peak_slot * SLOT_MINUTES % 60:02d} {peak_count:.0f}人"
+            )
+
+    def run_query(self, weekday=None, hours=None, since=None, until=None, status=None, show_rows=0):
+        """条件（曜日・時間帯・期間・ステータス）に合う記録を索引から検索して集計"""
+        try:
+            weekdays = parse_weekdays(weekday)
+            hour_set = parse_hours(hours)
+            since_date = parse_date(since)
+            until_date = parse_date(until)
+            statuses = parse_statuses(status, self.status_code_for_text)
+        except ValueError as e:
+            self.logger.error(f"❌ {e}")
+            return None
+        
+        # 索引は実行ごとに作り直すため、読み込み・索引構築も検索と並べて報告する
+        # 期間指定時は期間内の行だけを読み込む（月別パーティションは重なる月のみ）
+        started = time.perf_counter()
+        dataset = self.load_dataset(
+            since=f"{since_date} 00:00:00" if since_date else None,
+            until=f"{until_date} 23:59:59" if until_date else None,
+        )
+        loaded = time.perf_counter()
+        index = CrowdIndex(dataset)
+        indexed = time.perf_counter()
+        result = index.query(weekdays, hour_set, since_date, until_date, statuses)
+        finished = time.perf_counter()
+        
+        plan = {"weekday_hour": "曜日×時間帯", "datetime": "日時"}[result.plan]
+        self.logger.info(
+            f"🔎 検索結果: {len(result.rows)}件（走査 {result.scanned}行 / 読み込み {len(dataset)}行, 索引: {plan}）"
+        )
+        self.logger.info(
+            f"⏱️ 読み込み {(loaded - started) * 1000:.1f}ms, 索引構築 {(indexed - loaded) * 1000:.1f}ms, "
+            f"検索 {(finished - indexed) * 1000:.2f}ms（合計 {(finished - started) * 1000:.1f}ms）"
+        )
+        if not result.rows:
+            return result
+        
+        # 人数の分布（全体・時間帯別）
+        overall = HistogramSketch()
+        by_hour = defaultdict(HistogramSketch)
+        for row in result.rows:
+            overall.add(dataset.count[row])
+            by_hour[dataset.hour[row]].add(dataset.count[row])
+        p50, p90, p99 = overall.quantiles()
+        mean = sum(value * n for value, n in overall.counts.items()) / overall.total()
+        self.logger.info(
+            f"📊 平均 {mean:.1f}人, p50 {p50:.0f} / p90 {p90:.0f} / p99 {p99:.0f}人, "
+            f"最小-最大 {min(overall.counts)}-{max(overall.counts)}人"
+        )
+        for hour in sorted(by_hour):
+            sketch = by_hour[hour]
+            hour_mean = sum(value * n for value, n in sketch.counts.items()) / sketch.total()
+            self.logger.info(
+                f"  {hour:2d}:00 - {sketch.total():4d}件 平均 {hour_mean:5.1f}人 p90 {sketch.quantile(0.9):3.0f}人"
+            )
+        
+        if show_rows:
+            self.logger.info(f"📝 最新{min(show_rows, len(result.rows))}件:")
+            for row in sorted(result.rows, key=dataset.minute.__getitem__)[-show_rows:]:
+                self.logger.info(
+                    f"  {dataset.datetime_at(row):%Y-%m-%d %H:%M} "
+                    f"({'月火水木金土日'[dataset.weekday[row]]}) {dataset.count[row]:3d}人 {dataset.label_at(row)}"
+                )
+        return result
+
+    def update_readme_stats(self, total_count: int, latest_date: str, dataset=None):
+        """README.mdの統計情報を自動更新（datasetがなければ読み込み）"""
         try:
             readme_path = self.project_dir / "README.md"
             
@@ -400,9 +1030,9 @@ class GymImageOCRPipeline:
             if latest_date != "データなし":
                 # CSVファイルから最初のデータ日付を取得
                 try:
-                    existing_data, _ = self.read_existing_csv_data()
-                    if existing_data:
-                        earliest_date = min(item['datetime'] for item in existing_data).split(' ')[0]
+                    earliest = (dataset if dataset is not None else self.load_dataset()).earliest()
+                    if earliest:
+                        earliest_date = earliest.strftime("%Y-%m-%d")
                         data_period = f"{earliest_date}〜{latest_date}"
                     else:
                         data_period = latest_date
@@ -436,8 +1066,372 @@ class GymImageOCRPipeline:
             self.logger.error(f"README更新処理エラー: {e}")
             return False
 
-    def run_weekly_ocr_pipeline(self):
-        """週次画像OCR処理パイプライン（メイン処理）"""
+    def _new_item(self, image_path):
+        """ストリーム処理で受け渡す1画像分の作業データ"""
+        return {
+            "path": image_path, "timestamp": None, "phash": None, "digest": None,
+            "report": [], "text": "", "record": None, "error": False,
+        }
+
+    def _run_item_step(self, step, item):
+        """1画像に対して段の処理を実行（例外は画像単位の失敗として記録）"""
+        if item["error"]:
+            return item
+        try:
+            return step(item)
+        except Exception as e:
+            self.logger.error(f"画像処理エラー {item['path'].name}: {e}")
+            item["error"] = True
+            item["record"] = None
+            if item["timestamp"] is None:
+                item["timestamp"] = dt.datetime.fromtimestamp(0)
+            return item
+
+    def _decode_item(self, item):
+        """デコード段: ファイル名の日時と知覚ハッシュを求め、取り込み済みの近似重複を判定"""
+        image_path = item["path"]
+        item["timestamp"] = self.parse_filename_timestamp(image_path)
+        
+        # 知覚ハッシュで取り込み済み画像の近似重複を検出（OCR省略）
+        item["phash"] = self.perceptual_hash(image_path)
+        if item["phash"]:
+            started = time.perf_counter()
+            layout_key, phash = item["phash"]
+            match = self.phash_index.find(layout_key, phash, item["timestamp"].strftime("%Y-%m-%d %H:%M:%S"))
+            if match:
+                item["report"].append({"tier": "phash", "seconds": time.perf_counter() - started, "accepted": True})
+                self.logger.info(f"♻️ 近似重複画像のためOCR省略: {image_path.name} ≒ {match['image']}")
+                item["record"] = dict(match["record"])
+                item["phash"] = None
+        return item
+
+    def _ocr_item(self, item):
+        """OCR段: 未解決の画像からテキストを抽出（段ごとの所要時間をreportに記録）"""
+        if item["record"] is None:
+            # 画像のSHA-256はOCRキャッシュとマニフェスト記録で共有
+            item["digest"] = self.ocr_cache.image_digest(item["path"])
+            item["text"] = self.extract_text_from_image(item["path"], report=item["report"], digest=item["digest"])
+        return item
+
+    def _parse_item(self, item):
+        """解析段: OCRテキストからレコードを生成"""
+        if item["record"] is not None or not item["text"]:
+            return item
+        
+        # OCR中にレイアウトを学習した場合はウィジェット領域で索引用ハッシュを再計算
+        if item["phash"] and item["phash"][0].endswith(":full"):
+            item["phash"] = self.perceptual_hash(item["path"])
+        item["record"] = self.parse_gym_data(item["text"], item["timestamp"])
+        return item
+
+    def ocr_image(self, image_path):
+        """1画像のデコード+OCR+データ解析（ワーカープロセス・監視モードから呼ばれる）"""
+        item = self._new_item(image_path)
+        for step in (self._decode_item, self._ocr_item, self._parse_item):
+            item = self._run_item_step(step, item)
+        return item["path"], item["timestamp"], item["record"], item["report"], item["phash"], item["digest"]
+
+    def perceptual_hash(self, image_path):
+        """(レイアウトキー, 差分ハッシュ) を返す（学習済みならウィジェット領域で計算）"""
+        if not REGION_CROP_AVAILABLE:
+            return None
+        try:
+            width, height = image_size(image_path)
+            region = self.layout_templates.get(width, height)
+            layout_key = f"{width}x{height}:{','.join(map(str, region)) if region else 'full'}"
+            return layout_key, difference_hash(image_path, region)
+        except Exception as e:
+            self.logger.warning(f"知覚ハッシュ計算エラー {Path(image_path).name}: {e}")
+            return None
+
+    def _decode_stage(self, image_paths):
+        """デコード段（ストリーム）"""
+        for image_path in image_paths:
+            yield self._run_item_step(self._decode_item, self._new_item(image_path))
+
+    def _ocr_stage(self, items, jobs=1, batch_size=1):
+        """OCR段（ストリーム）: 逐次・バッチ・プロセスプールのいずれかで処理"""
+        if jobs > 1:
+            if batch_size > 1:
+                self.logger.warning("⚠️ --batch-size は --jobs 1 のときのみ有効です（並列処理を優先）")
+            # 各ワーカーが独自のEasyOCR Readerを保持するプロセスプール（投入数を制限）
+            with ProcessPoolExecutor(
+                max_workers=jobs,
+                initializer=_init_ocr_worker,
+                initargs=(self.ocr_cascade, self.ocr_min_confidence),
+            ) as executor:
+                in_flight = {}
+                for item in items:
+                    if item["record"] is not None or item["error"]:
+                        yield item
+                        continue
+                    in_flight[executor.submit(_ocr_item_worker, item)] = item
+                    if len(in_flight) >= jobs * 2:
+                        done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                        yield from self._collect_ocr_futures(done, in_flight)
+                if in_flight:
+                    yield from self._collect_ocr_futures(list(in_flight), in_flight)
+        elif batch_size > 1:
+            # EasyOCR段をbatch_size枚ずつまとめて推論し、結果はキャッシュ経由で逐次処理
+            chunk = []
+            for item in items:
+                chunk.append(item)
+                if len(chunk) >= batch_size:
+                    yield from self._ocr_chunk(chunk, batch_size)
+                    chunk = []
+            if chunk:
+                yield from self._ocr_chunk(chunk, batch_size)
+        else:
+            for item in items:
+                yield self._run_item_step(self._ocr_item, item)
+
+    def _ocr_chunk(self, chunk, batch_size):
+        """バッチ推論でキャッシュを温めてからチャンク内の画像をOCR"""
+        targets = [item["path"] for item in chunk if item["record"] is None and not item["error"]]
+        if targets:
+            self.prefetch_easyocr_batched(targets, batch_size=batch_size)
+        for item in chunk:
+            yield self._run_item_step(self._ocr_item, item)
+
+    def _collect_ocr_futures(self, done, in_flight):
+        """完了したワーカー処理の結果を取り出す"""
+        for future in done:
+            item = in_flight.pop(future)
+            try:
+                result = future.result()
+                self.layout_templates.merge(result.pop("learned_templates", None))
+                yield result
+            except Exception as e:
+                self.logger.error(f"画像処理エラー {item['path'].name}: {e}")
+                item["error"] = True
+                yield item
+
+    def _parse_stage(self, items):
+        """解析段（ストリーム）"""
+        for item in items:
+            yield self._run_item_step(self._parse_item, item)
+
+    def _commit_stage(self, items, commit_every=200, snapshot=None):
+        """コミット段（ストリーム）: レコードをまとめてCSVへコミットし、コミット済みの画像を流す"""
+        batch = []
+        record_count = 0
+        for item in items:
+            batch.append(item)
+            if item["record"]:
+                record_count += 1
+            if record_count >= commit_every:
+                yield from self._commit_batch(batch, snapshot)
+                batch = []
+                record_count = 0
+        if batch:
+            yield from self._commit_batch(batch, snapshot)
+
+    def _commit_batch(self, batch, snapshot=None):
+        """バッチをコミットし、成功後にマニフェストへ記録"""
+        records = [item["record"] for item in batch if item["record"]]
+        if records:
+            commit = self.commit_records(records, snapshot=snapshot)
+            if commit is None:
+                # コミット失敗時は画像をアーカイブせず次回に再処理
+                raise RuntimeError("CSV更新に失敗")
+            # 実行全体の追加件数はバッチごとの added の合計（総数・最終日時は最新のバッチのもの）
+            added = self.run_commit["added"] if self.run_commit else 0
+            self.run_commit = dict(commit, added=added + commit["added"])
+        for item in batch:
+            self.mark_image_seen(item["path"], item["digest"])
+        self.image_manifest.save()
+        yield from batch
+
+    @staticmethod
+    def format_ocr_report(report):
+        """OCRカスケードの段ごとの結果を1行に整形"""
+        return ", ".join(
+            f"{step['tier']}{'✓' if step['accepted'] else '✗'} {step['seconds'] * 1000:.0f}ms"
+            for step in report
+        )
+
+    def archive_result(self, image_path, parsed_data, report, phash):
+        """コミット済みの画像をアーカイブし、成功時は知覚ハッシュ索引に登録"""
+        if not parsed_data:
+            self.archive_image(image_path, success=False)
+            return False
+        
+        if phash:
+            self.phash_index.add(phash[0], phash[1], parsed_data, image_path.name)
+        self.archive_image(image_path, success=True)
+        self.logger.info(
+            f"✅ 処理成功: {image_path.name} -> {parsed_data['count']}人 "
+            f"[{self.format_ocr_report(report)}]"
+        )
+        return True
+
+    def commit_records(self, new_data, snapshot=None):
+        """新レコードを重複除去してCSVに追記コミット（成功時は行数・最終日時、失敗時None）
+        
+        snapshot を渡すと既存データとの重複判定をスナップショットで行い（CSVを読まない）、
+        コミットした行をスナップショットにも追加する
+        """
+        if self.crowd_store is not None:
+            return self._commit_records_store(new_data, snapshot)
+        with self._store_lock:
+            batch = self.dedupe_data(new_data, quiet=True)
+            if snapshot is not None:
+                new_rows = [row for row in batch if snapshot.is_new(row)]
+            else:
+                # 既存CSVを1回だけ走査してバッチと同じキーの行を除外
+                # （メモリはバッチ分のみ、計算量は O(既存行数 + バッチ行数)）
+                pending = {self.dedupe_key(row) for row in batch}
+                for row in self.iter_csv_rows():
+                    if not pending:
+                        break
+                    pending.discard(self.dedupe_key(row))
+                new_rows = [row for row in batch if self.dedupe_key(row) in pending]
+            self._log_duplicates(new_data, batch, new_rows)
+            
+            # 新しい行だけをCSVに追記
+            if new_rows:
+                self.logger.info("💾 CSVファイルに追記中...")
+                if not self.append_csv(new_rows):
+                    self.logger.error("❌ CSV更新に失敗")
+                    return None
+                if snapshot is not None:
+                    for row in new_rows:
+                        snapshot.add_row(row)
+                self.record_committed_rows(new_rows)
+            meta = self.load_csv_meta()
+        
+        if new_rows:
+            self.publish_dashboard_payload(snapshot)
+        self._schedule_compaction()
+        return {"added": len(new_rows), "total": meta["rows"], "latest": meta["last_datetime"]}
+
+    def _seed_crowd_store(self):
+        """保存先ストアが空なら既存CSVを取り込む（初回移行）"""
+        if self.crowd_store.count() > 0 or not self.csv_file.exists():
+            return
+        self.logger.info("🗄️ 既存CSVを保存先ストアに取り込み中...")
+        imported = self.crowd_store.insert_rows(self.iter_csv_rows())
+        self.logger.info(f"🗄️ {len(imported)}件を取り込み完了")
+
+    def _commit_records_store(self, new_data, snapshot=None):
+        """保存先ストアに重複なしでコミットし、新規行のみCSVエクスポートに追記"""
+        with self._store_lock:
+            try:
+                self._seed_crowd_store()
+                batch = self.dedupe_data(new_data, quiet=True)
+                new_rows = self.crowd_store.insert_rows(batch)
+            except Exception as e:
+                self.logger.error(f"❌ 保存先ストア更新に失敗: {e}")
+                return None
+            self._log_duplicates(new_data, batch, new_rows)
+            if snapshot is not None:
+                for row in new_rows:
+                    snapshot.add_row(row)
+            if new_rows:
+                self.record_committed_rows(new_rows)
+            
+            if new_rows:
+                self.logger.info("💾 CSVエクスポートに追記中...")
+                if not self.append_csv(new_rows):
+                    self.logger.error("❌ CSVエクスポート更新に失敗（export で再生成できます）")
+            total = self.crowd_store.count()
+            latest = self.crowd_store.latest_datetime()
+        
+        if new_rows:
+            self.publish_dashboard_payload(snapshot)
+        self._schedule_compaction()
+        return {"added": len(new_rows), "total": total, "latest": latest}
+
+    def export_csv(self):
+        """保存先ストアの内容でCSVを再生成"""
+        if self.crowd_store is None:
+            self.logger.error("❌ export は --store sqlite / partitioned 指定時のみ利用できます")
+            return False
+        with self._store_lock:
+            self._seed_crowd_store()
+            self.logger.info("📤 保存先ストアからCSVを再生成中...")
+            if not self.write_csv(self.crowd_store.iter_rows()):
+                self.logger.error("❌ CSVエクスポートに失敗")
+                return False
+            self.rebuild_columnar_mirror()
+        self.logger.info(f"✅ CSVエクスポート完了: {self.crowd_store.count()}件")
+        return True
+
+    def run_watch(self, jobs=1, poll_interval=2.0, settle_seconds=1.0):
+        """監視モード: 画像の到着を検知し、常駐OCRワーカーで処理して即座にコミット"""
+        self.logger.info("👀 監視モードを開始します (Ctrl+C で終了)...")
+        if not self.icloud_images.exists():
+            self.logger.error(f"iCloudディレクトリが存在しません: {self.icloud_images}")
+            return False
+        
+        watcher = create_watcher(self.icloud_images, poll_interval, logger=self.logger)
+        executor = None
+        if jobs > 1:
+            executor = ProcessPoolExecutor(
+                max_workers=jobs,
+                initializer=_init_ocr_worker,
+                initargs=(self.ocr_cascade, self.ocr_min_confidence),
+            )
+        elif self.easyocr.available:
+            self.easyocr.reader  # モデルを事前ロードして初回画像の待ち時間をなくす
+        
+        # 既存データは起動時に1回だけ読み込み、以降は画像ごとの重複判定に共有
+        snapshot = self.load_snapshot()
+        in_flight = {}
+        changed = True  # 起動時に未処理画像を一度走査
+        try:
+            while True:
+                if changed:
+                    time.sleep(settle_seconds)  # iCloudの書き込み完了を待つ
+                    pending = set(in_flight.values())
+                    for image_path in self.find_new_images():
+                        if image_path in pending:
+                            continue
+                        if executor:
+                            in_flight[executor.submit(_ocr_worker, image_path)] = image_path
+                        else:
+                            self._commit_watched_result(self.ocr_image(image_path), snapshot)
+                
+                if in_flight:
+                    done, _ = wait(list(in_flight), timeout=0.2, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        image_path = in_flight.pop(future)
+                        try:
+                            result, learned = future.result()
+                            self.layout_templates.merge(learned)
+                            self._commit_watched_result(result, snapshot)
+                        except Exception as e:
+                            self.logger.error(f"画像処理エラー {image_path.name}: {e}")
+                
+                changed = watcher.wait(0.2 if in_flight else poll_interval)
+        except KeyboardInterrupt:
+            self.logger.info("👋 監視モードを終了します")
+        finally:
+            watcher.close()
+            if executor:
+                executor.shutdown(wait=True, cancel_futures=True)
+            self.wait_for_compaction()
+            self.phash_index.save()
+            self.image_manifest.save()
+        return True
+
+    def _commit_watched_result(self, result, snapshot=None):
+        """監視モード: 1画像の結果を即座にコミットしてからアーカイブ"""
+        image_path, _, parsed_data, report, phash, digest = result
+        if parsed_data and self.commit_records([parsed_data], snapshot=snapshot) is None:
+            return  # コミット失敗時は画像を残して次回に再処理
+        self.mark_image_seen(image_path, digest)
+        if self.archive_result(image_path, parsed_data, report, phash):
+            self.logger.info(f"💾 コミット完了: {parsed_data['datetime']} {parsed_data['count']}人")
+        self.phash_index.save()
+        self.image_manifest.save()
+
+    def run_weekly_ocr_pipeline(self, jobs=1, batch_size=1, commit_every=200):
+        """週次画像OCR処理パイプライン（メイン処理）
+        
+        検出 → デコード → OCR → 解析 → コミット → アーカイブ の各段を
+        容量制限付きキューで接続し、先頭の画像から順次コミットする
+        """
         self.logger.info("🚀 週次画像OCR処理を開始します...")
         
         try:
@@ -449,80 +1443,62 @@ class GymImageOCRPipeline:
                 self.logger.info("📋 新しい画像はありませんでした")
                 return True
             
-            # 2. 画像からデータを抽出
-            self.logger.info(f"🔍 {len(image_files)}個の画像を処理中...")
-            new_data = []
-            processed_count = 0
+            # 既存データを1回だけ読み込み、コミット・分析・README更新で共有
+            snapshot = self.load_snapshot()
+            
+            # 2. ストリーム処理（各段は別スレッド、段間は容量制限付きキュー）
+            self.logger.info(f"🔍 {len(image_files)}個の画像を処理中... (並列数: {jobs})")
+            self.run_commit = None
+            new_count = 0
             failed_count = 0
+            tier_counts = defaultdict(int)
             
-            for image_path in image_files:
-                try:
-                    # OCRでテキスト抽出
-                    extracted_text = self.extract_text_from_image(image_path)
-                    if not extracted_text:
-                        self.archive_image(image_path, success=False)
-                        failed_count += 1
-                        continue
-                    
-                    # ファイル名から日時抽出
-                    timestamp = self.parse_filename_timestamp(image_path)
-                    
-                    # データ解析
-                    parsed_data = self.parse_gym_data(extracted_text, timestamp)
-                    if parsed_data:
-                        new_data.append(parsed_data)
-                        self.archive_image(image_path, success=True)
-                        processed_count += 1
-                        self.logger.info(f"✅ 処理成功: {image_path.name} -> {parsed_data['count']}人")
-                    else:
-                        self.archive_image(image_path, success=False)
-                        failed_count += 1
-                        
-                except Exception as e:
-                    self.logger.error(f"画像処理エラー {image_path.name}: {e}")
-                    self.archive_image(image_path, success=False)
+            decoded = bounded_stage(self._decode_stage(image_files), name="decode")
+            recognized = bounded_stage(self._ocr_stage(decoded, jobs=jobs, batch_size=batch_size), name="ocr")
+            parsed = bounded_stage(self._parse_stage(recognized), name="parse")
+            committed = bounded_stage(
+                self._commit_stage(parsed, commit_every=commit_every, snapshot=snapshot), name="commit"
+            )
+            
+            # 3. アーカイブ段（コミット済みの画像のみ移動）
+            for item in committed:
+                if self.archive_result(item["path"], item["record"], item["report"], item["phash"]):
+                    new_count += 1
+                    accepted = [step["tier"] for step in item["report"] if step["accepted"]]
+                    tier_counts[accepted[0] if accepted else "低確信度"] += 1
+                else:
                     failed_count += 1
             
-            self.logger.info(f"📊 画像処理完了: 成功{processed_count}件, 失敗{failed_count}件")
+            self.phash_index.save()
+            self.logger.info(f"📊 画像処理完了: 成功{new_count}件, 失敗{failed_count}件")
+            if tier_counts:
+                self.logger.info("🪜 OCR採用段: " + ", ".join(f"{tier} {n}件" for tier, n in tier_counts.items()))
             
-            if not new_data:
+            commit = self.run_commit
+            if not commit:
                 self.logger.warning("⚠️ 処理可能なデータがありませんでした")
                 return True
             
-            # 3. 既存データと統合
-            self.logger.info("🔗 既存データと統合中...")
-            existing_data, _ = self.read_existing_csv_data()
-            all_data = existing_data + new_data
-            
-            # 4. 重複除去
-            unique_data = self.dedupe_data(all_data)
+            total_count = commit["total"]
             
-            # 5. CSVファイル更新
-            self.logger.info("💾 CSVファイルを更新中...")
-            if not self.write_csv(unique_data):
-                self.logger.error("❌ CSV更新に失敗")
-                return False
-            
-            new_count = len(new_data)
-            total_count = len(unique_data)
-            
-            self.logger.info(f"✅ {new_count}件の新データを追加")
+            self.logger.info(f"✅ {commit['added']}件の新データを追加（重複除去後）")
             self.logger.info(f"📁 総データ数: {total_count}件")
             
             # 6. データ分析
             self.logger.info("📊 データ分析を実行中...")
-            self.analyze_data()
+            self.analyze_data(dataset=snapshot)
             
             # 7. README統計更新
             self.logger.info("📝 README.md統計情報を更新中...")
             try:
-                latest_date = max(item['datetime'] for item in unique_data) if unique_data else "データなし"
+                latest_date = commit["latest"] or "データなし"
                 if latest_date != "データなし":
                     latest_date = latest_date.split(' ')[0]  # 日付部分のみ取得
-                self.update_readme_stats(total_count, latest_date)
+                self.update_readme_stats(total_count, latest_date, dataset=snapshot)
             except Exception as e:
                 self.logger.error(f"README更新エラー: {e}")
             
+            self.wait_for_compaction()
             self.logger.info("🎉 週次画像OCR処理が完了しました！")
             return True
             
@@ -541,15 +1517,15 @@ class GymImageOCRPipeline:
         
         # 画像ファイルの確認
         image_files = self.find_new_images()
-        self.logger.info(f"📂 iCloud画像ファイル: {len(image_files)}個")
+        self.logger.info(f"📂 iCloud未処理画像ファイル: {len(image_files)}個")
         
-        # OCRエンジンの確認
-        if self.easyocr_reader:
-            self.logger.info("✅ EasyOCR: 利用可能")
+        # OCRエンジンの確認（モデルはロードせずインストール有無のみ確認）
+        if self.easyocr.available:
+            self.logger.info("✅ EasyOCR: 利用可能（初回OCR時に初期化）")
         else:
             self.logger.warning("⚠️ EasyOCR: 利用不可")
         
-        if TESSERACT_AVAILABLE:
+        if self.tesseract.available:
             self.logger.info("✅ Tesseract OCR: 利用可能")
         else:
             self.logger.warning("⚠️ Tesseract OCR: 利用不可")
@@ -561,6 +1537,17 @@ class GymImageOCRPipeline:
         else:
             self.logger.info("💾 既存CSV: ファイルが存在しません")
         
+        # 列指向ミラーの確認
+        if not self.columnar_mirror.available:
+            self.logger.info("🧱 列指向ミラー: pyarrow未導入のため無効（CSVから読み込み）")
+        elif self.columnar_mirror.is_fresh(self.csv_file):
+            self.logger.info(f"🧱 列指向ミラー: 最新 ({self.columnar_mirror.path.name})")
+        else:
+            self.logger.info("🧱 列指向ミラー: 未生成またはCSVが外部で編集済み（次回読み込み時に再生成）")
+        
+        # 起動時間の確認
+        self.logger.info(f"⏱️ 起動時間: {startup_elapsed() * 1000:.0f}ms (予算 {STARTUP_BUDGET_SEC * 1000:.0f}ms)")
+        
         # ディレクトリ権限の確認
         for path in [self.icloud_images, self.processed_dir, self.failed_dir, self.csv_file.parent]:
             if path.exists() and os.access(path, os.R_OK | os.W_OK):
@@ -572,23 +1559,159 @@ class GymImageOCRPipeline:
         return True
 
 
+def startup_elapsed():
+    """プロセス開始からのCPU時間（秒、インタプリタ起動と全importを含む）"""
+    return time.process_time()
+
+
+def check_startup_budget(logger, command):
+    """起動時間を計測し、予算超過時に警告"""
+    elapsed = startup_elapsed()
+    if elapsed > STARTUP_BUDGET_SEC:
+        logger.warning(f"⚠️ 起動時間が予算超過 ({command}): {elapsed * 1000:.0f}ms > {STARTUP_BUDGET_SEC * 1000:.0f}ms")
+    else:
+        logger.debug(f"起動時間 ({command}): {elapsed * 1000:.0f}ms")
+    return elapsed
+
+
+# ワーカープロセス専用のパイプライン（プロセスごとにOCRエンジンを保持）
+_worker_pipeline = None
+
+
+def _init_ocr_worker(ocr_cascade=None, ocr_min_confidence=0.5):
+    """ワーカープロセス初期化: プロセス専用のパイプラインを生成"""
+    global _worker_pipeline
+    _worker_pipeline = GymImageOCRPipeline(ocr_cascade=ocr_cascade, ocr_min_confidence=ocr_min_confidence)
+    # テンプレートファイルは親プロセスだけが書き込む（学習結果は結果と一緒に返す）
+    _worker_pipeline.layout_templates.persist = False
+
+
+def _ocr_worker(image_path):
+    """ワーカープロセスで1画像のOCR+解析を実行（結果, 学習したテンプレート）"""
+    result = _worker_pipeline.ocr_image(image_path)
+    return result, _worker_pipeline.layout_templates.take_learned()
+
+
+def _ocr_item_worker(item):
+    """ワーカープロセスでストリーム処理のOCR段を実行（学習したテンプレートを item に添付）"""
+    item = _worker_pipeline._run_item_step(_worker_pipeline._ocr_item, item)
+    item["learned_templates"] = _worker_pipeline.layout_templates.take_learned()
+    return item
+
+
+class _StageError:
+    """段のスレッドで発生した例外を下流へ伝える"""
+
+    def __init__(self, error):
+        self.error = error
+
+
+_STAGE_END = object()
+
+
+def bounded_stage(iterable, maxsize=32, name="stage"):
+    """イテラブルを別スレッドで実行し、容量制限付きキュー経由で要素を流す"""
+    buffer = queue.Queue(maxsize=maxsize)
+    
+    def produce():
+        try:
+            for element in iterable:
+                buffer.put(element)
+        except BaseException as e:
+            buffer.put(_StageError(e))
+        finally:
+            buffer.put(_STAGE_END)
+    
+    threading.Thread(target=produce, name=f"ocr-pipeline-{name}", daemon=True).start()
+    while True:
+        element = buffer.get()
+        if element is _STAGE_END:
+            return
+        if isinstance(element, _StageError):
+            raise element.error
+        yield element
+
+
+def parse_options(args):
+    """コマンドオプションを解析"""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="OCRを並列実行するワーカープロセス数")
+    parser.add_argument("--batch-size", type=int, default=1,
+                        help="同一サイズの画像をまとめてEasyOCR推論する枚数")
+    parser.add_argument("--poll-interval", type=float, default=2.0,
+                        help="watchモードのポーリング間隔（秒、inotify非対応環境）")
+    parser.add_argument("--cascade", default=None,
+                        help="OCRカスケード順（カンマ区切り、例: tesseract_roi,easyocr_full）")
+    parser.add_argument("--min-confidence", type=float, default=0.5,
+                        help="EasyOCR段を採用する平均信頼度の下限")
+    parser.add_argument("--store", choices=GymImageOCRPipeline.STORE_BACKENDS, default="csv",
+                        help="保存先バックエンド（sqlite: UNIQUE制約で重複除去, partitioned: 月別CSV。いずれもCSVはエクスポート）")
+    # query の検索条件
+    parser.add_argument("--weekday", default=None,
+                        help="曜日（カンマ区切り、例: Sun / sat,sun / 土,日）")
+    parser.add_argument("--hours", default=None,
+                        help="時間帯（両端を含む、例: 9-14 / 19 / 22-2）")
+    parser.add_argument("--since", default=None, help="開始日（例: 2025-08-01）")
+    parser.add_argument("--until", default=None, help="終了日（その日を含む）")
+    parser.add_argument("--status", default=None,
+                        help="ステータスコードまたは表記（カンマ区切り、例: 3,4 / 混雑 / やや空いています）")
+    parser.add_argument("--rows", type=int, default=0, help="該当レコードを最新から表示する件数")
+    # serve の待ち受け先
+    parser.add_argument("--host", default="127.0.0.1", help="APIサーバーの待ち受けアドレス")
+    parser.add_argument("--port", type=int, default=8765, help="APIサーバーのポート番号")
+    options, _ = parser.parse_known_args(args)
+    options.jobs = max(1, options.jobs)
+    options.batch_size = max(1, options.batch_size)
+    if options.cascade:
+        options.cascade = [tier.strip() for tier in options.cascade.split(",") if tier.strip()]
+    return options
+
+
 def main():
     """メイン実行関数"""
-    pipeline = GymImageOCRPipeline()
-    
     import sys
     
+    options = parse_options(sys.argv[2:])
+    try:
+        pipeline = GymImageOCRPipeline(
+            ocr_cascade=options.cascade, ocr_min_confidence=options.min_confidence, store=options.store
+        )
+    except ValueError as e:
+        print(f"❌ {e}")
+        print(f"利用可能なOCR段: {', '.join(GymImageOCRPipeline.OCR_TIERS)}")
+        return
+    
     if len(sys.argv) > 1:
         command = sys.argv[1]
+        if command in ("diagnose", "analyze", "forecast", "query"):
+            check_startup_budget(pipeline.logger, command)
         if command == "--weekly":
-            pipeline.run_weekly_ocr_pipeline()
+            pipeline.run_weekly_ocr_pipeline(jobs=options.jobs, batch_size=options.batch_size)
+        elif command == "watch":
+            pipeline.run_watch(jobs=options.jobs, poll_interval=options.poll_interval)
+        elif command == "compact":
+            pipeline.compact_csv()
+        elif command == "export":
+            pipeline.export_csv()
         elif command == "diagnose":
             pipeline.diagnose_system()
         elif command == "analyze":
             pipeline.analyze_data()
+        elif command == "forecast":
+            pipeline.forecast_report()
+        elif command == "serve":
+            # asyncio はサーバー起動時のみ読み込む
+            from crowd_api_server import serve
+            serve(pipeline, host=options.host, port=options.port)
+        elif command == "query":
+            pipeline.run_query(
+                weekday=options.weekday, hours=options.hours, since=options.since,
+                until=options.until, status=options.status, show_rows=options.rows,
+            )
         else:
             print(f"❌ 不明なコマンド: {command}")
-            print("利用可能なコマンド: --weekly, diagnose, analyze")
+            print("利用可能なコマンド: --weekly [--jobs N] [--batch-size N] [--cascade 段1,段2,...], watch [--jobs N] [--poll-interval S], compact, export, diagnose, analyze, forecast, query [--weekday 曜日] [--hours 9-14] [--since 日付] [--until 日付] [--status 状態] [--rows N], serve [--host H] [--port N] (共通: --store csv|sqlite|partitioned)")
     else:
         # インタラクティブモード
         print("🤖 ジム混雑状況 画像OCR自動化システム（無料版）")
@@ -8,6 +8,9 @@ export const CONFIG = {
   // Data source configuration
   DATA: {
     CSV_FILE_PATH: '../../data/fit_place24_data.csv',
+    // パイプラインが出力する曜日×時間帯の集計済みペイロード（全期間表示はこれだけで描画）
+    AGGREGATES_PATH: '../../data/crowd_aggregates.json',
+    AGGREGATES_VERSION: 1,
     CACHE_DURATION: 5 * 60 * 1000, // 5 minutes
     RETRY_ATTEMPTS: 3,
     RETRY_DELAY: 1000, // 1 second
@@ -286,16 +286,29 @@ export class Dashboard {
     
     try {
       this.log('info', '📊 Loading data...');
-      this.updateLoadingStatus('CSVファイルを読み込んでいます...');
 
-      // Load CSV data
-      const csvData = await dataLoader.loadCSV();
-      
-      this.log('info', '🔄 Processing data...');
-      this.updateLoadingStatus('データを処理しています...');
+      // 全期間表示はパイプラインの集計済みペイロードで描画（生CSVは期間指定時のみ読み込む）
+      let result = null;
+      if (!this.currentFilter || !this.currentFilter.period || this.currentFilter.period === 'all') {
+        this.updateLoadingStatus('集計データを読み込んでいます...');
+        const payload = await dataLoader.loadAggregates();
+        if (payload) {
+          result = dataProcessor.processAggregatePayload(payload);
+        }
+      }
+
+      if (!result) {
+        this.updateLoadingStatus('CSVファイルを読み込んでいます...');
 
-      // Process data with current filter
-      const result = await dataProcessor.processCSVData(csvData, this.currentFilter);
+        // Load CSV data
+        const csvData = await dataLoader.loadCSV();
+        
+        this.log('info', '🔄 Processing data...');
+        this.updateLoadingStatus('データを処理しています...');
+
+        // Process data with current filter
+        result = await dataProcessor.processCSVData(csvData, this.currentFilter);
+      }
       
       this.currentData = result.hourlyData;
       this.statistics = result.statistics;
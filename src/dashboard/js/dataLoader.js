@@ -68,6 +68,43 @@ export class DataLoader {
     }
   }
 
+  /**
+   * 集計済みペイロード（crowd_aggregates.json）を読み込む
+   * @param {string} filePath - ペイロードのパス
+   * @param {boolean} useCache - キャッシュを使用するか
+   * @returns {Promise<object|null>} ペイロード（存在しない・形式が異なる場合はnull）
+   */
+  async loadAggregates(filePath = CONFIG.DATA.AGGREGATES_PATH, useCache = true) {
+    if (useCache && this.isCacheValid(filePath)) {
+      this.log('info', `📦 Using cached aggregates for: ${filePath}`);
+      return this.cache.get(filePath).data;
+    }
+
+    try {
+      const response = await fetch(filePath);
+      if (!response.ok) {
+        throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+      }
+
+      const payload = await response.json();
+      if (payload.version !== CONFIG.DATA.AGGREGATES_VERSION) {
+        throw new Error(`Unsupported aggregates version: ${payload.version}`);
+      }
+
+      this.cache.set(filePath, {
+        data: payload,
+        timestamp: Date.now(),
+        size: payload.total_records
+      });
+      this.log('info', `✅ Aggregates loaded (data version ${payload.data_version}, ${payload.total_records} records)`);
+      return payload;
+
+    } catch (error) {
+      this.log('warn', `⚠️ Aggregates unavailable, falling back to CSV: ${error.message}`);
+      return null;
+    }
+  }
+
   /**
    * リトライ機能付きfetch
    * @param {string} filePath - ファイルパス
@@ -15,6 +15,7 @@ export class DataProcessor {
     this.rawData = [];
     this.processedData = {};
     this.statistics = {};
+    this.totalRecords = 0;
   }
 
   /**
@@ -60,6 +61,7 @@ export class DataProcessor {
       this.rawData = filteredData;
       this.processedData = hourlyData;
       this.statistics = statistics;
+      this.totalRecords = filteredData.length;
 
       return {
         hourlyData,
@@ -81,6 +83,95 @@ export class DataProcessor {
     }
   }
 
+  /**
+   * 集計済みペイロードを processCSVData と同じ形式の結果に変換
+   * @param {object} payload - パイプラインが出力した crowd_aggregates.json
+   * @returns {object} 処理されたデータオブジェクト
+   */
+  processAggregatePayload(payload) {
+    const startTime = performance.now();
+    const hourlyData = {};
+    const statistics = {};
+
+    for (const weekday of CONFIG.WEEKDAYS.ORDER) {
+      const cells = payload.weekdays[weekday];
+      const totalRecords = cells ? cells.count.reduce((a, b) => a + b, 0) : 0;
+      if (totalRecords === 0) continue;
+
+      hourlyData[weekday] = {};
+      statistics[weekday] = {
+        hourly: {},
+        daily: {
+          totalRecords: totalRecords,
+          averageCount: 0,
+          minCount: Infinity,
+          maxCount: -Infinity,
+          hoursWithData: 0
+        }
+      };
+
+      let dailySum = 0;
+      for (let hour = 0; hour < 24; hour++) {
+        const count = cells.count[hour];
+        if (count === 0) {
+          hourlyData[weekday][hour] = { average: 0, count: 0, min: 0, max: 0, hasData: false };
+          continue;
+        }
+
+        const mean = cells.mean[hour];
+        hourlyData[weekday][hour] = {
+          average: Math.round(mean),
+          count: count,
+          min: cells.min[hour],
+          max: cells.max[hour],
+          hasData: true
+        };
+        statistics[weekday].hourly[hour] = {
+          count: count,
+          average: mean,
+          min: cells.min[hour],
+          max: cells.max[hour],
+          sum: mean * count,
+          standardDeviation: cells.std[hour],
+          records: []
+        };
+
+        const daily = statistics[weekday].daily;
+        dailySum += mean * count;
+        daily.minCount = Math.min(daily.minCount, cells.min[hour]);
+        daily.maxCount = Math.max(daily.maxCount, cells.max[hour]);
+        daily.hoursWithData++;
+      }
+      statistics[weekday].daily.averageCount = dailySum / totalRecords;
+    }
+
+    const processingTime = performance.now() - startTime;
+    this.log('info', `🎯 Aggregates processed in ${processingTime.toFixed(2)}ms (data version ${payload.data_version})`);
+
+    this.rawData = [];
+    this.processedData = hourlyData;
+    this.statistics = statistics;
+    this.totalRecords = payload.total_records;
+
+    const { start, end } = payload.date_range;
+    const days = start && end ? Math.round((new Date(end) - new Date(start)) / (1000 * 60 * 60 * 24)) + 1 : 0;
+
+    return {
+      hourlyData,
+      statistics,
+      rawData: [],
+      metadata: {
+        totalRecords: payload.total_records,
+        originalRecords: payload.total_records,
+        processingTime: processingTime,
+        weekdays: Object.keys(hourlyData),
+        dateRange: { start, end, days },
+        filterOptions: { period: 'all' },
+        dataVersion: payload.data_version
+      }
+    };
+  }
+
   /**
    * CSVテキストをパースしてオブジェクト配列に変換
    * @param {string} csvText - CSVテキスト
@@ -544,7 +635,7 @@ export class DataProcessor {
       processedData: this.processedData,
       statistics: this.statistics,
       metadata: {
-        totalRecords: this.rawData.length,
+        totalRecords: this.totalRecords,
         weekdays: Object.keys(this.processedData),
         exportedAt: new Date().toISOString()
       }